@@ -18,6 +18,21 @@ WORD_BOUNDARY_LANG = '_'
 WORD_BOUNDARY_TREE = '\u0000'
 
 
+def _replace_unicode_var(match: re.Match) -> str:
+    """Substitution callback turning a {UNI_XXXX} match into its character."""
+    hex_code = match.group(1)
+    try:
+        # Convert hex to Unicode character
+        unicode_char = chr(int(hex_code, 16))
+        # Special case: replace underscore with word boundary
+        if unicode_char == '_':
+            return '\u0001'
+        return unicode_char
+    except ValueError:
+        # Invalid hex code - return original
+        return match.group(0)
+
+
 class Fragment:
     """A fragment is a sequence of equivalences.
     
@@ -45,7 +60,7 @@ class Fragment:
         
         # Split the fragment, turn it into an array of arrays, e.g. [[h],[a,ä],[i,ï]]
         equivalences = self.EQUIVALENCE_RX_OUT.split(expression)
-        equivalences = [eq.strip() for eq in equivalences if eq.strip()]
+        equivalences = [eq for eq in (eq.strip() for eq in equivalences) if eq]
         
         equivalences = [self._parse_equivalence(eq) for eq in equivalences]
         if not equivalences:
@@ -74,7 +89,7 @@ class Fragment:
             parts = inner.split(self.EQUIVALENCE_SEPARATOR, -1)
             # Each part is an alternative; split each alternative into tokens
             return [
-                [self._finalize_fragment_leaf(leaf.strip()) for leaf in part.split()]
+                [self._finalize_fragment_leaf(leaf) for leaf in part.split()]
                 for part in parts
             ]
         else:
@@ -95,23 +110,10 @@ class Fragment:
         Returns:
             Processed leaf token with Unicode variables converted
         """
-        if self.sheaf.is_src():
+        if self.sheaf.is_src:
             # Replace {UNI_XXXX} by its value to allow any unicode char to be found
             # in the transcription tree (matches Ruby behavior exactly)
-            def replace_unicode(match):
-                hex_code = match.group(1)
-                try:
-                    # Convert hex to Unicode character
-                    unicode_char = chr(int(hex_code, 16))
-                    # Special case: replace underscore with word boundary
-                    if unicode_char == '_':
-                        return '\u0001'
-                    return unicode_char
-                except ValueError:
-                    # Invalid hex code - return original
-                    return match.group(0)
-            
-            leaf = UNICODE_VAR_NAME_REGEXP_OUT.sub(replace_unicode, leaf)
+            leaf = UNICODE_VAR_NAME_REGEXP_OUT.sub(_replace_unicode_var, leaf)
             
             # Replace '_' (word boundary) by '\u0000' to allow the real 
             # underscore to be used in the transcription tree
@@ -197,11 +199,11 @@ class Fragment:
     
     def is_src(self) -> bool:
         """Check if this is a source fragment."""
-        return self.sheaf.is_src()
+        return self.sheaf.is_src
     
     def is_dst(self) -> bool:
         """Check if this is a destination fragment."""
-        return self.sheaf.is_dst()
+        return not self.sheaf.is_src
     
     def __str__(self) -> str:
         """String representation of the fragment."""
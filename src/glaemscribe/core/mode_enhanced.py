@@ -31,16 +31,6 @@ class Option:
             self.values = {self.default_value: 1}
 
 
-@dataclass
-class ModeDebugContext:
-    """Debug context for mode processing."""
-    preprocessor_output: str = ""
-    processor_pathes: List[str] = field(default_factory=list)
-    processor_output: List[str] = field(default_factory=list)
-    postprocessor_output: str = ""
-    tts_output: str = ""
-
-
 class Mode:
     """Enhanced Mode class matching the Ruby implementation.
     
@@ -5,7 +5,7 @@ following the JavaScript implementation exactly.
 """
 
 import re
-from typing import Any
+from typing import Any, Optional
 from .post_processor.base import PrePostProcessorOperator
 from ..parsers.glaeml import Node
 
@@ -50,6 +50,9 @@ class RxSubstitutePreProcessorOperator(PrePostProcessorOperator):
     Matches JavaScript's RxSubstitutePreProcessorOperator exactly.
     """
     
+    # Last compiled pattern, reused while the finalized pattern is unchanged
+    _regex: Optional[re.Pattern] = None
+    
     def finalize(self, trans_options: dict):
         """Finalize the operator, converting Ruby-style backrefs to Python-style."""
         super().finalize(trans_options)
@@ -79,5 +82,7 @@ class RxSubstitutePreProcessorOperator(PrePostProcessorOperator):
                 result = result.replace(f'\\{i}', group)
             return result
         
-        regex = re.compile(pattern)
+        regex = self._regex
+        if regex is None or regex.pattern != pattern:
+            regex = self._regex = re.compile(pattern)
         return regex.sub(replace_func, text)
@@ -5,7 +5,7 @@ rule with source and destination sheaf chains.
 """
 
 from __future__ import annotations
-from typing import List, Optional
+from typing import Callable, List, Optional
 from .sheaf_chain import SheafChain
 from .sheaf_chain_iterator import SheafChainIterator
 from .sub_rule import SubRule
@@ -18,6 +18,9 @@ class Rule:
     all possible SubRule combinations.
     """
     
+    __slots__ = ('line', 'rule_group', 'mode', 'sub_rules', 'errors',
+                 'cross_schema', 'src_sheaf_chain', 'dst_sheaf_chain')
+    
     def __init__(self, line: int, rule_group):
         """Initialize a rule.
         
@@ -36,23 +39,26 @@ class Rule:
         self.src_sheaf_chain: Optional[SheafChain] = None
         self.dst_sheaf_chain: Optional[SheafChain] = None
     
-    def finalize(self, cross_schema: Optional[str] = None):
+    def finalize(self, cross_schema: Optional[str] = None, sink: Optional[Callable[[SubRule], None]] = None):
         """Finalize the rule by generating all sub-rules.
         
         Args:
             cross_schema: Optional cross schema for rule processing
+            sink: Optional callback receiving each sub-rule as it is generated.
+                It is responsible for storing it; defaults to appending to
+                ``self.sub_rules``.
         """
+        if sink is None:
+            sink = self.sub_rules.append
+        
         # Store the cross schema
         self.cross_schema = cross_schema
         if self.errors:
-            # Add errors to mode
-            for error in self.errors:
-                self.mode.errors.append(error)
-            return
+            return self._bail()
         
         if not self.src_sheaf_chain or not self.dst_sheaf_chain:
             self.errors.append("Rule missing source or destination chain")
-            return
+            return self._bail()
         
         # Create iterators for source and destination chains
         srccounter = SheafChainIterator(self.src_sheaf_chain)
@@ -60,52 +66,46 @@ class Rule:
         
         if srccounter.errors:
             self.errors.extend(srccounter.errors)
-            for error in self.errors:
-                self.mode.errors.append(error)
-            return
+            return self._bail()
         
         if dstcounter.errors:
             self.errors.extend(dstcounter.errors)
-            for error in self.errors:
-                self.mode.errors.append(error)
-            return
+            return self._bail()
         
         # Check prototypes match
         srcp = srccounter.prototype
         dstp = dstcounter.prototype
         
         if srcp != dstp:
-            error_msg = f"Source and destination are not compatible ({srcp} vs {dstp})"
-            self.errors.append(error_msg)
-            self.mode.errors.append(error_msg)
-            return
+            self.errors.append(f"Source and destination are not compatible ({srcp} vs {dstp})")
+            return self._bail()
         
         # Generate all sub-rules (match JS logic exactly)
         try:
-            # do-while loop: process current state first, then iterate
-            while True:
-                # Get all source combinations for current iterator state
-                src_combinations = srccounter.combinations()
-                
+            # Each source state is paired with the current destination state;
+            # both advance in lockstep and the source side decides when to stop
+            for src_combinations in srccounter:
                 # Get ONE destination combination (all sources map to same destination)
-                dst_combinations = dstcounter.combinations()
-                dst_combination = dst_combinations[0] if dst_combinations else []
+                dst_combination = next(dstcounter.iter_combinations())
                 
                 # Create sub-rules pairing each source with this destination
                 for src_combination in src_combinations:
-                    self.sub_rules.append(SubRule(self, src_combination, dst_combination))
+                    sink(SubRule(self, src_combination, dst_combination))
                 
                 # Advance destination iterator
                 dstcounter.iterate()
-                
-                # Advance source iterator; if no more sources, stop
-                if not srccounter.iterate():
-                    break
                     
         except Exception as e:
             self.errors.append(f"Error generating sub-rules: {e}")
-            for error in self.errors:
-                self.mode.errors.append(error)
+            return self._bail()
+    
+    def _bail(self):
+        """Propagate this rule's errors to the mode in one go.
+        
+        Every error exit of finalize goes through here, so each error
+        reaches the mode exactly once.
+        """
+        self.mode.errors.extend(self.errors)
     
     def __str__(self) -> str:
         """String representation of the rule."""
@@ -6,13 +6,23 @@ rules, and conditional logic.
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Union, Any
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Union
+import functools
 import re
+import sys
 
 from ..parsers.glaeml import Node, Error
 from .rule import Rule
+from .sub_rule import SubRule
 from .sheaf_chain import SheafChain
 
+# Slotted dataclasses need Python 3.10; older versions keep a __dict__
+_DATACLASS_SLOTS: Dict[str, bool] = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+class _EvaluationOverflow(Exception):
+    """Raised when variables nest deeper than apply_vars allows."""
+
 
 class RegexPatterns:
     VAR_NAME_REGEXP = re.compile(r'{([0-9A-Z_]+)}')
@@ -25,9 +35,31 @@ class RegexPatterns:
     
     CROSS_SCHEMA_REGEXP = re.compile(r'[0-9]+(\s*,\s*[0-9]+)*')
     CROSS_RULE_REGEXP = re.compile(r'^\s*(.*?)\s+-->\s+([0-9]+(?:\s*,\s*[0-9]+)*|{[0-9A-Z_]+}|identity)\s+-->\s+(.+?)\s*$')
+    
+    # All four line shapes above fused into one alternation, tried in the same
+    # order; match.lastgroup names the kind of line that matched
+    _VAR_DECL_ALT = r'(?P<var_decl>{(?P<var_name>[0-9A-Z_]+)}\s+===\s+(?P<var_value>.+?))'
+    _POINTER_VAR_DECL_ALT = r'(?P<pointer_var_decl>{(?P<pointer_name>[0-9A-Z_]+)}\s+<=>\s+(?P<pointer_value>.+?))'
+    _CROSS_RULE_ALT = r'(?P<cross_rule>(?P<cross_source>.*?)\s+-->\s+(?P<cross_schema>[0-9]+(?:\s*,\s*[0-9]+)*|{[0-9A-Z_]+}|identity)\s+-->\s+(?P<cross_target>.+?))'
+    _RULE_ALT = r'(?P<rule>(?P<source>.*?)\s+-->\s+(?P<target>.+?))'
+    
+    LINE_REGEXP = re.compile(
+        r'^\s*(?:' + '|'.join((_VAR_DECL_ALT, _POINTER_VAR_DECL_ALT, _CROSS_RULE_ALT, _RULE_ALT)) + r')\s*$'
+    )
+    # Declarations start with '{', so other lines can only be rules; rules
+    # always contain '-->', so '{' lines without one can only be declarations
+    RULE_LINE_REGEXP = re.compile(
+        r'^\s*(?:' + '|'.join((_CROSS_RULE_ALT, _RULE_ALT)) + r')\s*$'
+    )
+    DECL_LINE_REGEXP = re.compile(
+        r'^\s*(?:' + '|'.join((_VAR_DECL_ALT, _POINTER_VAR_DECL_ALT)) + r')\s*$'
+    )
+    
+    # Inline comment \** ... **\ (non-greedy)
+    INLINE_COMMENT_REGEXP = re.compile(r'\\?\*\*.*?\*\*\\?')
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class RuleGroupVar:
     """A variable in a rule group."""
     name: str
@@ -39,9 +71,43 @@ class RuleGroupVar:
         return self.is_pointer
 
 
+# Built-in variables seeded into every rule group on finalize (match Ruby).
+# Variables are replaced rather than mutated, so the instances are shared.
+_DEFAULT_VARS: Dict[str, RuleGroupVar] = {
+    name: RuleGroupVar(name, value, False)
+    for name, value in (
+        ("NULL", ""),
+        # Characters that are not easily entered or visible in a text editor
+        ("NBSP", "{UNI_A0}"),
+        ("WJ", "{UNI_2060}"),
+        ("ZWSP", "{UNI_200B}"),
+        ("ZWNJ", "{UNI_200C}"),
+        # The following characters are used by the mode syntax
+        ("UNDERSCORE", "{UNI_5F}"),
+        ("ASTERISK", "{UNI_2A}"),
+        ("COMMA", "{UNI_2C}"),
+        ("LPAREN", "{UNI_28}"),
+        ("RPAREN", "{UNI_29}"),
+        ("LBRACKET", "{UNI_5B}"),
+        ("RBRACKET", "{UNI_5D}"),
+    )
+}
+
+
+class Term:
+    """Base class for the terms held by a code block."""
+    
+    __slots__ = ()
+    
+    # Tag the finalize passes dispatch on; a class variable, never a field
+    TERM_KIND: ClassVar[Optional[str]] = None
+
+
 class CodeBlock:
     """A block of code with conditional logic."""
     
+    __slots__ = ('terms', 'parent_if_cond')
+    
     def __init__(self):
         """Initialize a code block."""
         self.terms: List[Union[IfCond, CodeLine, IfTerm, Any]] = []
@@ -53,19 +119,30 @@ class CodeBlock:
 
 
 @dataclass
-class CodeLine:
+class CodeLine(Term):
     """A single line of code in a rule group."""
+    TERM_KIND = 'code_line'
+    
+    __slots__ = ('expression', 'line', '_is_skippable', '_match')
+    
     expression: str
     line: int
     
     def __post_init__(self):
-        """Clean up the expression."""
+        """Clean up the expression, once for all finalize passes."""
         self.expression = self.expression.strip()
+        # Empty lines and comments produce nothing
+        self._is_skippable = not self.expression or self.expression.startswith('**')
+        # Line regex match (None if not understood), filled in by the first
+        # finalize; False until then
+        self._match: Union[bool, Optional[re.Match]] = False
 
 
-@dataclass
-class CodeLinesTerm:
+@dataclass(**_DATACLASS_SLOTS)
+class CodeLinesTerm(Term):
     """A term containing multiple code lines."""
+    TERM_KIND = 'code_lines'
+    
     parent_code_block: CodeBlock
     code_lines: List[CodeLine] = field(default_factory=list)
     
@@ -74,9 +151,13 @@ class CodeLinesTerm:
         return True
 
 
-class IfTerm:
+class IfTerm(Term):
     """Represents a complete if/elsif/else block."""
     
+    TERM_KIND = 'if'
+    
+    __slots__ = ('parent_code_block', 'conds')
+    
     def __init__(self, parent_code_block: CodeBlock):
         """Initialize an if term."""
         self.parent_code_block: CodeBlock = parent_code_block
@@ -88,18 +169,53 @@ class IfTerm:
         return "  "
 
 
-@dataclass
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
+class Condition:
+    """A pre-parsed if/elsif condition.
+    
+    kind is 'eq' for "option == VALUE" comparisons, 'true' for the literal
+    used by else clauses, and 'bool' for anything else. expression is the
+    condition without its negation, name and value the operands of 'eq'.
+    """
+    expression: str
+    negated: bool = False
+    kind: str = 'bool'
+    name: str = ''
+    value: str = ''
+    
+    @classmethod
+    def parse(cls, expression: str) -> Condition:
+        """Parse a condition expression such as "!split_diphthongs" or "option == VALUE"."""
+        expression = expression.strip()
+        
+        # Handle negation operator
+        negated = False
+        if expression.startswith('!'):
+            negated = True
+            expression = expression[1:].strip()
+        
+        if '==' in expression:
+            name, value = expression.split('==', 1)
+            return cls(expression, negated, 'eq', name.strip(), value.strip().strip('"\''))
+        if expression.lower() == 'true':
+            return cls(expression, negated, 'true')
+        return cls(expression, negated)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class IfCond:
     """A conditional statement in a rule group."""
     line: int
     expression: str
     parent_if_term: Optional[IfTerm] = None
     child_code_block: Optional[CodeBlock] = field(default_factory=CodeBlock)
+    condition: Condition = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
-        """Set up the child code block parent."""
+        """Set up the child code block parent and parse the condition."""
         if self.child_code_block:
             self.child_code_block.parent_if_cond = self
+        self.condition = Condition.parse(self.expression)
 
 
 class RuleGroup:
@@ -119,78 +235,167 @@ class RuleGroup:
     
     CROSS_SCHEMA_REGEXP = RegexPatterns.CROSS_SCHEMA_REGEXP
     CROSS_RULE_REGEXP = RegexPatterns.CROSS_RULE_REGEXP
+    LINE_REGEXP = RegexPatterns.LINE_REGEXP
+    RULE_LINE_REGEXP = RegexPatterns.RULE_LINE_REGEXP
+    DECL_LINE_REGEXP = RegexPatterns.DECL_LINE_REGEXP
     
     def __init__(self, mode, name: str):
         """Initialize a rule group."""
         self.name: str = name
         self.mode = mode
         self.vars: Dict[str, RuleGroupVar] = {}
+        # Fully expanded variable values and expressions, valid until the
+        # next add/remove
+        self._expanded_vars: Dict[str, str] = {}
+        self._expanded_exprs: Dict[str, str] = {}
         self.macros: Dict[str, Any] = {}
         self.root_code_block: CodeBlock = CodeBlock()
         self.rules: List[Any] = []  # Will be populated after finalization
+        self.in_charset: Dict[str, RuleGroup] = {}
+        # Results of convert_unicode_vars for strings that converted cleanly
+        self._unicode_cache: Dict[str, str] = {}
+        # Interned token combinations shared by this group's sub-rules
+        self._combinations: Dict[tuple, List[str]] = {}
     
     def add_var(self, var_name: str, value: str, is_pointer: bool = False):
         """Add a variable to the rule group."""
+        # Names come from a small fixed set and are looked up constantly
+        var_name = sys.intern(var_name)
         self.vars[var_name] = RuleGroupVar(var_name, value, is_pointer)
+        self._expanded_vars.clear()
+        self._expanded_exprs.clear()
+    
+    def remove_var(self, var_name: str):
+        """Remove a variable from the rule group, if present."""
+        if var_name in self.vars:
+            del self.vars[var_name]
+            self._expanded_vars.clear()
+            self._expanded_exprs.clear()
     
     def add_macro(self, macro):
         """Add a macro to the rule group."""
         self.macros[macro.name] = macro
     
     def apply_vars(self, line: int, string: str, allow_unicode_vars: bool = False) -> Optional[str]:
-        """Apply variable substitutions to a string.
+        """Replace all variables in an expression with their values.
         
-        This mirrors the Ruby implementation's apply_vars method with
-        iterative replacement for nested variables.
+        This matches the Ruby apply_vars implementation: variables are
+        expanded until none are left, with the same 16 level nesting limit.
+        Expansions of variables and of whole expressions are memoized until
+        the variable scope changes.
         
         Args:
             line: Line number for error reporting
-            string: The string with variables to substitute
-            allow_unicode_vars: Whether to allow unicode variables
-        
+            string: The string to process
+            allow_unicode_vars: Whether to allow Unicode variables
+            
         Returns:
-            Resolved string or None if error
+            The processed string, or None if there was an error
         """
-        ret = string
-        stack_depth = 0
-        had_replacements = True
+        # Most expressions reference no variable at all
+        if '{' not in string:
+            return string
         
-        # Prevent infinite loops
-        max_iterations = 100
+        ret = self._expanded_exprs.get(string)
+        if ret is None:
+            try:
+                ret = self._expand_vars(line, string, string, 0)
+                # Ruby substitutes until nothing changes: values joined side by
+                # side may form a new reference (e.g. "{" followed by "X}")
+                passes = 0
+                while ret is not None and '{' in ret:
+                    expanded = self._expand_vars(line, ret, string, 0)
+                    if expanded == ret:
+                        break
+                    passes += 1
+                    if passes > 16:
+                        raise _EvaluationOverflow
+                    ret = expanded
+            except _EvaluationOverflow:
+                self.mode.errors.append(Error(
+                    line,
+                    f"In expression: {string}: evaluation stack overflow."
+                ))
+                return None
+            if ret is None:
+                return None
+            self._expanded_exprs[string] = ret
+        
+        # Unicode variables are kept intact and will be replaced at the last moment of parsing
+        # This matches Ruby behavior exactly
+        if not allow_unicode_vars and '{' in ret:
+            error_occurred = False
+            for match in self.UNICODE_VAR_NAME_REGEXP_OUT.finditer(ret):
+                self.mode.errors.append(Error(
+                    line, 
+                    f"In expression: {string}: making wrong use of unicode variable: {match.group(0)}. Unicode vars can only be used in source members of a rule or in the definition of another variable."
+                ))
+                error_occurred = True
+            if error_occurred:
+                return None
+        
+        return ret
+    
+    def _expand_vars(self, line: int, string: str, expression: str, depth: int) -> Optional[str]:
+        """Recursively expand the variables referenced in a string.
         
-        while had_replacements and stack_depth < max_iterations:
-            had_replacements = False
+        Args:
+            line: Line number for error reporting
+            string: The string to expand
+            expression: The expression given to apply_vars, for error messages
+            depth: Nesting depth of string below that expression
             
-            # Find and replace variables
-            def replace_var(match):
-                nonlocal had_replacements
-                cap_var = match.group(0)
-                vname = match.group(1)
-                
-                v = self.vars.get(vname)
-                if not v:
-                    # Check if it's a unicode variable
-                    if self.UNICODE_VAR_NAME_REGEXP_IN.match(vname):
-                        if allow_unicode_vars:
-                            # Keep unicode variable intact for later processing
-                            return cap_var
-                        else:
-                            self.mode.errors.append(Error(line, f"In expression: {string}: making wrong use of unicode variable: {cap_var}. Unicode vars can only be used in source members of a rule or in the definition of another variable."))
-                            return cap_var
-                    else:
-                        self.mode.errors.append(Error(line, f"In expression: {string}: failed to evaluate variable: {cap_var}."))
-                        return cap_var
-                else:
-                    had_replacements = True
-                    return v.value
+        Returns:
+            The expanded string, or None if a variable could not be evaluated
+            (every such variable is reported, not just the first one)
             
-            ret = self.VAR_NAME_REGEXP.sub(replace_var, ret)
-            stack_depth += 1
+        Raises:
+            _EvaluationOverflow: If variables nest more than 16 levels deep
+        """
+        if '{' not in string:
+            return string
         
-        if stack_depth >= max_iterations:
-            self.mode.errors.append(Error(line, f"In expression: {string}: variable substitution exceeded maximum iterations - possible circular reference."))
+        variables = self.vars
+        expanded_vars = self._expanded_vars
+        parts = []
+        pos = 0
+        error_occurred = False
         
-        return ret
+        for match in self.VAR_NAME_REGEXP.finditer(string):
+            parts.append(string[pos:match.start()])
+            pos = match.end()
+            vname = match.group(1)
+            
+            var = variables.get(vname)
+            if var is not None:
+                value = expanded_vars.get(vname)
+                if value is None:
+                    if depth >= 16:
+                        raise _EvaluationOverflow
+                    value = self._expand_vars(line, var.value, expression, depth + 1)
+                    if value is None:
+                        # Reported further down; keep looking for other failures
+                        error_occurred = True
+                        continue
+                    expanded_vars[vname] = value
+                parts.append(value)
+            elif vname.startswith('UNI_') and self.UNICODE_VAR_NAME_REGEXP_IN.match(vname):
+                # Keep Unicode variable intact for later processing
+                parts.append(match.group(0))
+            else:
+                self.mode.errors.append(Error(
+                    line,
+                    f"In expression: {expression}: failed to evaluate variable: {match.group(0)}."
+                ))
+                error_occurred = True
+        
+        if error_occurred:
+            return None
+        if not parts:
+            return string
+        
+        parts.append(string[pos:])
+        return "".join(parts)
     
     def traverse_if_tree(self, root_element: Node, text_procedure, element_procedure):
         """Traverse an if tree structure and build the code blocks.
@@ -203,56 +408,76 @@ class RuleGroup:
             text_procedure: Function to handle text elements
             element_procedure: Function to handle element nodes
         """
-        owner = self  # The rule group
-        root_code_block = self.root_code_block
+        self._traverse_if_tree(self.root_code_block, root_element, text_procedure, element_procedure)
+    
+    def _traverse_if_tree(self, root_code_block: CodeBlock, root_element: Node,
+                          text_procedure, element_procedure):
+        """Build the code blocks under root_code_block (shared with Macro).
+        
+        Args:
+            root_code_block: Code block receiving the top level terms
+            root_element: The root element to traverse
+            text_procedure: Function to handle text elements
+            element_procedure: Function to handle element nodes
+        """
+        dispatch = self._IF_DISPATCH
         current_parent_code_block = root_code_block
         
         for child in root_element.children:
             if child.is_text():
-                # Handle text elements
                 text_procedure(current_parent_code_block, child)
             elif child.is_element():
-                # Handle element nodes
-                if child.name == 'if':
-                    cond_attribute = child.args[0] if child.args else ""
-                    if_term = IfTerm(current_parent_code_block)
-                    current_parent_code_block.add_term(if_term)
-                    if_cond = self._create_if_cond_for_if_term(child.line, if_term, cond_attribute)
-                    current_parent_code_block = if_cond.child_code_block
-                    
-                elif child.name == 'elsif':
-                    cond_attribute = child.args[0] if child.args else ""
-                    if_term = current_parent_code_block.parent_if_cond.parent_if_term if current_parent_code_block.parent_if_cond else None
-                    
-                    if not if_term:
-                        self.mode.errors.append(Error(child.line, "'elsif' without a 'if'."))
-                        return
-                    
-                    if_cond = self._create_if_cond_for_if_term(child.line, if_term, cond_attribute)
-                    current_parent_code_block = if_cond.child_code_block
-                    
-                elif child.name == 'else':
-                    if_term = current_parent_code_block.parent_if_cond.parent_if_term if current_parent_code_block.parent_if_cond else None
-                    
-                    if not if_term:
-                        self.mode.errors.append(Error(child.line, "'else' without a 'if'."))
-                        return
-                    
-                    if_cond = self._create_if_cond_for_if_term(child.line, if_term, "true")
-                    current_parent_code_block = if_cond.child_code_block
-                    
-                elif child.name == 'endif':
-                    if_term = current_parent_code_block.parent_if_cond.parent_if_term if current_parent_code_block.parent_if_cond else None
-                    
-                    if not if_term:
-                        self.mode.errors.append(Error(child.line, "'endif' without a 'if'."))
-                        return
-                    
-                    current_parent_code_block = if_term.parent_code_block
-                    
-                else:
-                    # Handle other element types
+                handler = dispatch.get(child.name)
+                if handler is None:
+                    # Handle other element types (deploy, etc.)
                     element_procedure(current_parent_code_block, child)
+                    continue
+                current_parent_code_block = handler(self, child, current_parent_code_block)
+                if current_parent_code_block is None:
+                    return
+    
+    def _open_if(self, child: Node, code_block: CodeBlock) -> Optional[CodeBlock]:
+        """Handle 'if': open a new IfTerm in code_block."""
+        cond_attribute = child.args[0] if child.args else ""
+        if_term = IfTerm(code_block)
+        code_block.add_term(if_term)
+        return self._create_if_cond_for_if_term(child.line, if_term, cond_attribute).child_code_block
+    
+    def _open_elsif(self, child: Node, code_block: CodeBlock) -> Optional[CodeBlock]:
+        """Handle 'elsif': add a conditional branch to the enclosing IfTerm."""
+        if_term = self._enclosing_if_term(child, code_block)
+        if not if_term:
+            return None
+        cond_attribute = child.args[0] if child.args else ""
+        return self._create_if_cond_for_if_term(child.line, if_term, cond_attribute).child_code_block
+    
+    def _open_else(self, child: Node, code_block: CodeBlock) -> Optional[CodeBlock]:
+        """Handle 'else': add an unconditional branch to the enclosing IfTerm."""
+        if_term = self._enclosing_if_term(child, code_block)
+        if not if_term:
+            return None
+        return self._create_if_cond_for_if_term(child.line, if_term, "true").child_code_block
+    
+    def _close_if(self, child: Node, code_block: CodeBlock) -> Optional[CodeBlock]:
+        """Handle 'endif': go back to the code block owning the IfTerm."""
+        if_term = self._enclosing_if_term(child, code_block)
+        if not if_term:
+            return None
+        return if_term.parent_code_block
+    
+    def _enclosing_if_term(self, child: Node, code_block: CodeBlock) -> Optional[IfTerm]:
+        """Return the IfTerm code_block belongs to, or report a dangling keyword."""
+        if code_block.parent_if_cond:
+            return code_block.parent_if_cond.parent_if_term
+        self.mode.errors.append(Error(child.line, f"'{child.name}' without a 'if'."))
+        return None
+    
+    _IF_DISPATCH = {
+        'if': _open_if,
+        'elsif': _open_elsif,
+        'else': _open_else,
+        'endif': _close_if,
+    }
     
     def _create_if_cond_for_if_term(self, line: int, if_term: IfTerm, expression: str) -> IfCond:
         """Create an IfCond for an IfTerm.
@@ -269,117 +494,83 @@ class RuleGroup:
         if_term.conds.append(if_cond)
         return if_cond
     
-    def finalize(self, transcription_options: Dict[str, Any]):
-        """Finalize the rule group by processing all code blocks.
-        
-        This matches the Ruby finalize method exactly.
-        
-        Args:
-            transcription_options: Current transcription options
-        """
-        # Reset state
-        self.vars = {}
-        self.in_charset = {}
-        self.rules = []
-        
-        # Add default variables (match Ruby)
-        self.add_var("NULL", "", False)
-        
-        # Characters that are not easily entered or visible in a text editor
-        self.add_var("NBSP", "{UNI_A0}", False)
-        self.add_var("WJ", "{UNI_2060}", False)
-        self.add_var("ZWSP", "{UNI_200B}", False)
-        self.add_var("ZWNJ", "{UNI_200C}", False)
-        
-        # The following characters are used by the mode syntax
-        self.add_var("UNDERSCORE", "{UNI_5F}", False)
-        self.add_var("ASTERISK", "{UNI_2A}", False)
-        self.add_var("COMMA", "{UNI_2C}", False)
-        self.add_var("LPAREN", "{UNI_28}", False)
-        self.add_var("RPAREN", "{UNI_29}", False)
-        self.add_var("LBRACKET", "{UNI_5B}", False)
-        self.add_var("RBRACKET", "{UNI_5D}", False)
-        
-        # Process all code blocks to extract variables and rules
-        self.descend_if_tree(self.root_code_block, transcription_options)
-        
-        # Build the input charset from all finalized rules
-        self._build_input_charset()
-    
-    def _build_input_charset(self):
-        """Build the input charset from all finalized rules.
-        
-        This matches the Ruby implementation exactly:
-        rules.each{ |r| 
-          r.sub_rules.each { |sr|
-            sr.src_combination.join("").split(//).each{ |inchar|
-              @in_charset[inchar] = self if inchar != WORD_BREAKER && inchar != WORD_BOUNDARY_TREE
-            }
-          }
-        }
-        """
-        from ..core.transcription_processor import TranscriptionProcessor
-        
-        for rule in self.rules:
-            for sub_rule in rule.sub_rules:
-                # Join the source combination and split into individual characters
-                src_string = "".join(sub_rule.src_combination)
-                for inchar in src_string:
-                    # Add the character to the map of input characters
-                    # Ignore word breaker and boundary characters
-                    if (inchar != TranscriptionProcessor.WORD_BREAKER and 
-                        inchar != TranscriptionProcessor.WORD_BOUNDARY_TREE):
-                        # Temporary guard: do not let 'numbers' group capture A/B in normal prose
-                        if self.name == 'numbers' and inchar in ('A', 'B'):
-                            continue
-                        self.in_charset[inchar] = self
-    
     def descend_if_tree(self, code_block: CodeBlock, trans_options: Dict[str, Any]):
         """Process a code block and all its terms, handling conditionals and macros.
         
-        This matches the Ruby/JS descend_if_tree implementation.
+        This matches the Ruby/JS descend_if_tree implementation. Nested
+        blocks are walked with an explicit stack rather than by recursion:
+        each frame holds the remaining terms of a block and an optional
+        callback to run once they are exhausted (used to close macro scopes).
         
         Args:
             code_block: The code block to process
             trans_options: Current transcription options
         """
-        for term in code_block.terms:
-            if isinstance(term, CodeLinesTerm):
+        stack = [(iter(code_block.terms), None)]
+        # Options are fixed for the whole walk, and macros repeat the same
+        # conditions on every deployment
+        condition_results: Dict[Condition, bool] = {}
+        
+        while stack:
+            terms, on_exit = stack[-1]
+            term = next(terms, None)
+            
+            if term is None:
+                # Block finished, resume the enclosing one
+                stack.pop()
+                if on_exit is not None:
+                    on_exit()
+                continue
+            
+            kind = term.TERM_KIND
+            if kind == 'code_lines':
                 # Process all code lines in this term
                 for code_line in term.code_lines:
                     self.finalize_code_line(code_line)
             
-            elif hasattr(term, 'is_macro_deploy') and term.is_macro_deploy():
-                # Handle macro deployment
-                self._deploy_macro(term, trans_options)
+            elif kind == 'macro_deploy':
+                # Handle macro deployment: push its scope, run its body, then retract it
+                on_exit = self._deploy_macro(term)
+                stack.append((iter(term.macro.root_code_block.terms), on_exit))
             
-            elif isinstance(term, IfTerm):
+            elif kind == 'if':
                 # Process conditional blocks
                 for if_cond in term.conds:
-                    if self._evaluate_condition(if_cond.expression, trans_options):
+                    condition = if_cond.condition
+                    result = condition_results.get(condition)
+                    if result is None:
+                        result = self._evaluate_condition(condition, trans_options)
+                        condition_results[condition] = result
+                    if result:
                         # This condition is true, process its child block
-                        self.descend_if_tree(if_cond.child_code_block, trans_options)
+                        stack.append((iter(if_cond.child_code_block.terms), None))
                         break  # Only process first true condition
     
-    def _deploy_macro(self, macro_deploy, trans_options: Dict[str, Any]):
+    def _deploy_macro(self, macro_deploy) -> Callable[[], None]:
         """Deploy a macro with its arguments.
         
-        This matches the Ruby macro deployment implementation.
+        This matches the Ruby macro deployment implementation. The macro's
+        arguments are pushed as local variables; its code block is then
+        processed by the caller.
         
         Args:
             macro_deploy: The MacroDeployTerm to process
-            trans_options: Current transcription options
+            
+        Returns:
+            Callback removing the local variables and closing the error
+            backtrace, to be called once the macro's code block is done
         """
         macro = macro_deploy.macro
         line = macro_deploy.line
         
-        # Add macro backtrace for error reporting
-        from ..parsers.glaeml import Error
-        backtrace_error = Error(line, f">> Macro backtrace : {macro.name}")
-        self.mode.errors.append(backtrace_error)
+        # Remember where the macro backtrace opens; it is only written out
+        # if errors show up while the macro is deployed
+        errors_before = len(self.mode.errors)
         
         # First, test if variables can be pushed (check for conflicts)
-        arg_values = []
+        names: List[str] = []
+        vals: List[Optional[str]] = []
+        active_idx: List[int] = []
         for i, arg_name in enumerate(macro.arg_names):
             var_value = None
             
@@ -388,7 +579,6 @@ class RuleGroup:
                     line, 
                     f"Local variable {arg_name} hinders a variable with the same name in this context. Use only local variable names in macros!"
                 ))
-                var_value = None
             else:
                 # Evaluate local variable
                 if i < len(macro_deploy.arg_value_expressions):
@@ -401,36 +591,57 @@ class RuleGroup:
                             f"Thus, variable {{{arg_name}}} could not be declared."
                         ))
             
-            arg_values.append({'name': arg_name, 'val': var_value})
+            names.append(arg_name)
+            vals.append(var_value)
+            if var_value is not None:
+                active_idx.append(i)
         
         # Push local vars after the whole loop to avoid interferences
-        for v in arg_values:
-            if v['val'] is not None:
-                self.add_var(v['name'], v['val'], False)
+        for i in active_idx:
+            self.add_var(names[i], vals[i], False)
         
-        # Execute the macro's code block
-        self.descend_if_tree(macro.root_code_block, trans_options)
+        return functools.partial(self._retract_macro, macro_deploy, [names[i] for i in active_idx], errors_before)
+    
+    def _retract_macro(self, macro_deploy, local_names: List[str], errors_before: int):
+        """Close a macro deployment once its code block has been processed.
         
+        Args:
+            macro_deploy: The MacroDeployTerm being closed
+            local_names: Names of the local variables pushed by _deploy_macro
+            errors_before: Number of mode errors when the macro was deployed
+        """
         # Remove the local vars from the scope
-        for v in arg_values:
-            if v['val'] is not None:
-                if v['name'] in self.vars:
-                    del self.vars[v['name']]
-        
-        # Handle error backtrace cleanup
-        if self.mode.errors and self.mode.errors[-1] == backtrace_error:
-            # Remove the error scope if there were no errors
-            self.mode.errors.pop()
-        else:
-            # Add another one to close the context
-            self.mode.errors.append(Error(line, f"<< Macro backtrace : {macro.name}"))
+        for name in local_names:
+            self.remove_var(name)
+        
+        # Wrap the macro's errors in a backtrace (nothing to do without errors)
+        errors = self.mode.errors
+        if len(errors) > errors_before:
+            name = macro_deploy.macro.name
+            errors.insert(errors_before, Error(macro_deploy.line, f">> Macro backtrace : {name}"))
+            errors.append(Error(macro_deploy.line, f"<< Macro backtrace : {name}"))
     
     @staticmethod
     def strip_inline_comments(text: str) -> str:
         """Remove inline comments \\** ... **\\ from text."""
-        import re
-        # Match \** followed by anything until **\ (non-greedy)
-        return re.sub(r'\\?\*\*.*?\*\*\\?', '', text)
+        if '**' not in text:
+            return text
+        return RegexPatterns.INLINE_COMMENT_REGEXP.sub('', text)
+    
+    def _match_code_line(self, expression: str) -> Optional[re.Match]:
+        """Match a code line against the line shapes it can possibly have.
+        
+        Args:
+            expression: The code line, without comments
+            
+        Returns:
+            The match (its lastgroup names the kind of line), or None
+        """
+        is_rule = '-->' in expression
+        # Only lines starting with '{' can be variable declarations
+        if expression.lstrip().startswith('{'):
+            return (self.LINE_REGEXP if is_rule else self.DECL_LINE_REGEXP).match(expression)
+        return self.RULE_LINE_REGEXP.match(expression) if is_rule else None
     
     def finalize_code_line(self, code_line: CodeLine):
         """Process a single code line and extract variables or rules.
@@ -440,20 +651,22 @@ class RuleGroup:
         Args:
             code_line: The code line to process
         """
-        expression = code_line.expression.strip()
-        
-        # Skip empty lines and comments
-        if not expression or expression.startswith('**'):
+        # Skip empty lines and comments (the expression is already stripped)
+        if code_line._is_skippable:
             return
         
-        # Strip inline comments before processing
-        expression = self.strip_inline_comments(expression)
-        
-        # Check for variable declaration (JS: VAR_DECL_REGEXP)
-        if self.VAR_DECL_REGEXP.match(expression):
-            match = self.VAR_DECL_REGEXP.match(expression)
-            var_name = match.group(1)
-            var_value_ex = match.group(2)
+        # The line itself never changes, so it is classified only once
+        match = code_line._match
+        if match is False:
+            # Strip inline comments before processing
+            match = self._match_code_line(self.strip_inline_comments(code_line.expression))
+            code_line._match = match
+        kind = match.lastgroup if match else None
+        
+        # Variable declaration (JS: VAR_DECL_REGEXP)
+        if kind == 'var_decl':
+            var_name = match.group('var_name')
+            var_value_ex = match.group('var_value')
             # Resolve variables in the value (JS: apply_vars)
             var_value = self.apply_vars(code_line.line, var_value_ex, True)
             if var_value is None:
@@ -462,20 +675,16 @@ class RuleGroup:
             self.add_var(var_name, var_value, False)
             return
         
-        # Check for pointer variable declaration (JS: POINTER_VAR_DECL_REGEXP)
-        if self.POINTER_VAR_DECL_REGEXP.match(expression):
-            match = self.POINTER_VAR_DECL_REGEXP.match(expression)
-            var_name = match.group(1)
-            var_value_ex = match.group(2)
-            self.add_var(var_name, var_value_ex, True)
+        # Pointer variable declaration (JS: POINTER_VAR_DECL_REGEXP)
+        if kind == 'pointer_var_decl':
+            self.add_var(match.group('pointer_name'), match.group('pointer_value'), True)
             return
         
-        # Check for cross rule (JS: CROSS_RULE_REGEXP)
-        if self.CROSS_RULE_REGEXP.match(expression):
-            match = self.CROSS_RULE_REGEXP.match(expression)
-            source = match.group(1)
-            cross = match.group(2)
-            target = match.group(3)
+        # Cross rule (JS: CROSS_RULE_REGEXP)
+        if kind == 'cross_rule':
+            source = match.group('cross_source')
+            cross = match.group('cross_schema')
+            target = match.group('cross_target')
             # Handle variable substitution for cross (if it's a variable reference)
             if cross.startswith('{') and cross.endswith('}'):
                 var_name = cross[1:-1]  # Remove { }
@@ -489,15 +698,13 @@ class RuleGroup:
             self.finalize_rule(code_line.line, source, target, cross)
             return
         
-        # Check for regular rule (JS: RULE_REGEXP)
-        if self.RULE_REGEXP.match(expression):
-            match = self.RULE_REGEXP.match(expression)
-            source = match.group(1)
-            target = match.group(2)
-            self.finalize_rule(code_line.line, source, target, None)
+        # Regular rule (JS: RULE_REGEXP)
+        if kind == 'rule':
+            self.finalize_rule(code_line.line, match.group('source'), match.group('target'), None)
             return
         
         # Unknown expression
+        expression = self.strip_inline_comments(code_line.expression)
         self.mode.errors.append(Error(code_line.line, f"Cannot understand: {expression}"))
     
     def convert_unicode_vars(self, line: int, string: str) -> str:
@@ -513,35 +720,30 @@ class RuleGroup:
         Returns:
             String with Unicode characters
         """
+        cached = self._unicode_cache.get(string)
+        if cached is not None:
+            return cached
+        
+        error_count = len(self.mode.errors)
+        
         def replace_unicode(match):
+            # The regexp only captures hex digits, so int() cannot fail here
             hex_code = match.group(1)
-            try:
-                # Validate hex code format
-                if not all(c in '0123456789ABCDEFabcdef' for c in hex_code):
-                    self.mode.errors.append(Error(
-                        line,
-                        f"Invalid Unicode hex code format: {hex_code}"
-                    ))
-                    return match.group(0)
-                
-                # Convert to integer and validate range
-                code_point = int(hex_code, 16)
-                if code_point > 0x10FFFF:  # Unicode limit
-                    self.mode.errors.append(Error(
-                        line,
-                        f"Unicode code point out of range: {hex_code}"
-                    ))
-                    return match.group(0)
-                
-                return chr(code_point)
-            except ValueError:
+            code_point = int(hex_code, 16)
+            if code_point > 0x10FFFF:  # Unicode limit
                 self.mode.errors.append(Error(
                     line,
-                    f"Invalid Unicode hex code: {hex_code}"
+                    f"Unicode code point out of range: {hex_code}"
                 ))
                 return match.group(0)
+            
+            return chr(code_point)
         
-        return self.UNICODE_VAR_NAME_REGEXP_OUT.sub(replace_unicode, string)
+        result = self.UNICODE_VAR_NAME_REGEXP_OUT.sub(replace_unicode, string)
+        # Only clean conversions are cached, so errors are reported every time
+        if len(self.mode.errors) == error_count:
+            self._unicode_cache[string] = result
+        return result
     
     def finalize_rule(self, line: int, match_exp: str, replacement_exp: str, cross_schema: Optional[str] = None):
         """Create and finalize a rule using the proper Rule pipeline.
@@ -575,12 +777,33 @@ class RuleGroup:
         rule.src_sheaf_chain = SheafChain(rule, match, True)
         rule.dst_sheaf_chain = SheafChain(rule, replacement, False)
         
-        # Finalize the rule to generate sub-rules
-        rule.finalize(cross_schema)
+        # Finalize the rule to generate sub-rules, indexing them as they come
+        rule.finalize(cross_schema, self._add_sub_rule)
         
         # Add the rule to our rules list
         self.rules.append(rule)
     
+    def _add_sub_rule(self, sub_rule: SubRule):
+        """Store a freshly generated sub-rule and register its input characters.
+        
+        Token combinations are interned so that sub-rules producing the same
+        tokens share one list; they are never mutated once generated.
+        
+        Args:
+            sub_rule: The sub-rule emitted by Rule.finalize
+        """
+        # Equal combinations share a single list
+        src = sub_rule.src_combination
+        dst = sub_rule.dst_combination
+        sub_rule.src_combination = self._combinations.setdefault(tuple(src), src)
+        sub_rule.dst_combination = self._combinations.setdefault(tuple(dst), dst)
+        
+        sub_rule.rule.sub_rules.append(sub_rule)
+        for inchar in sub_rule.src_combination:
+            # Ignore word boundary markers
+            if inchar != "|" and inchar != "\u0000":
+                self.in_charset[inchar] = self
+    
     def _process_code_block(self, code_block: CodeBlock, trans_options: Dict[str, Any]):
         """Process a code block and extract rules.
         
@@ -589,13 +812,14 @@ class RuleGroup:
             trans_options: Current transcription options
         """
         for term in code_block.terms:
-            if isinstance(term, CodeLine):
+            kind = term.TERM_KIND
+            if kind == 'code_line':
                 self._process_code_line(term.expression, term.line)
-            elif isinstance(term, CodeLinesTerm):
+            elif kind == 'code_lines':
                 # Process multiple code lines
                 for code_line in term.code_lines:
                     self._process_code_line(code_line.expression, code_line.line)
-            elif isinstance(term, IfTerm):
+            elif kind == 'if':
                 # Process conditional blocks
                 self._process_if_term(term, trans_options)
     
@@ -606,34 +830,33 @@ class RuleGroup:
             line: The line to process
             line_num: Line number for error reporting
         """
-        line = line.strip()
-        
-        # Skip empty lines and comments
+        # Skip empty lines and comments; trailing whitespace is left to the
+        # line regexes, which already allow it
+        line = line.lstrip()
         if not line or line.startswith('**'):
             return
         
+        match = self._match_code_line(line)
+        if not match:
+            return
+        kind = match.lastgroup
+        
         # Check if it's a variable declaration
-        match = self.VAR_DECL_REGEXP.match(line)
-        if match:
-            var_name = match.group(1)
-            var_value = match.group(2)
-            self.add_var(var_name, var_value)
+        if kind == 'var_decl':
+            self.add_var(match.group('var_name'), match.group('var_value'))
             return
         
         # Check if it's a pointer variable declaration
-        match = self.POINTER_VAR_DECL_REGEXP.match(line)
-        if match:
-            var_name = match.group(1)
-            var_value = match.group(2)
-            self.add_var(var_name, var_value, is_pointer=True)
+        if kind == 'pointer_var_decl':
+            self.add_var(match.group('pointer_name'), match.group('pointer_value'), is_pointer=True)
             return
         
-        # Check if it's a cross transcription rule (match Ruby exactly)
-        match = self.CROSS_RULE_REGEXP.match(line)
-        if match:
-            source = match.group(1).strip()
-            cross_schema = match.group(2).strip()
-            target = match.group(3).strip()
+        # Check if it's a cross transcription rule (match Ruby exactly);
+        # the regex groups come out already trimmed
+        if kind == 'cross_rule':
+            source = match.group('cross_source')
+            cross_schema = match.group('cross_schema')
+            target = match.group('cross_target')
             
             # Apply variable resolution (match Ruby logic)
             if cross_schema.startswith("{") and cross_schema.endswith("}"):
@@ -653,15 +876,12 @@ class RuleGroup:
             self.finalize_rule(line_num, source, target, cross_schema)
             return
         
-        # Check if it's a normal transcription rule
-        match = self.RULE_REGEXP.match(line)
-        if match:
-            source = match.group(1).strip()
-            target = match.group(2).strip()
-            
-            # Use the proper finalize_rule method without cross schema
-            self.finalize_rule(line_num, source, target)
-            return
+        # Otherwise it's a normal transcription rule
+        source = match.group('source')
+        target = match.group('target')
+        
+        # Use the proper finalize_rule method without cross schema
+        self.finalize_rule(line_num, source, target)
     
     def _resolve_variables(self, expression: str, line_num: int) -> Optional[str]:
         """Resolve variables in an expression.
@@ -684,130 +904,46 @@ class RuleGroup:
         """
         for if_cond in if_term.conds:
             # Evaluate the condition
-            if self._evaluate_condition(if_cond.expression, trans_options):
+            if self._evaluate_condition(if_cond.condition, trans_options):
                 # Condition is true - process the code block
                 self._process_code_block(if_cond.child_code_block, trans_options)
                 break  # Only first true condition executes
     
-    def _evaluate_condition(self, expression: str, trans_options: Dict[str, Any]) -> bool:
+    def _evaluate_condition(self, condition: Condition, trans_options: Dict[str, Any]) -> bool:
         """Evaluate a conditional expression.
         
         Args:
-            expression: The condition expression (e.g., "implicit_a", "!split_diphthongs", "option == VALUE")
+            condition: The parsed condition (e.g. of "implicit_a", "!split_diphthongs", "option == VALUE")
             trans_options: Current transcription options
         
         Returns:
             True if condition is satisfied
         """
-        expression = expression.strip()
-        
-        # Handle negation operator
-        negated = False
-        if expression.startswith('!'):
-            negated = True
-            expression = expression[1:].strip()
+        expression = condition.expression
         
         # Handle simple boolean options
         if expression in trans_options:
             result = str(trans_options[expression]).lower() == 'true'
-            return not result if negated else result
         
         # Handle equality comparisons
-        if '==' in expression:
-            parts = expression.split('==', 1)
-            if len(parts) == 2:
-                option_name = parts[0].strip()
-                expected_value = parts[1].strip().strip('"\'')
-                
-                # Get actual value from trans_options or mode defaults
-                if option_name in trans_options:
-                    actual_value = trans_options[option_name]
-                elif option_name in self.mode.options:
-                    actual_value = self.mode.options[option_name].default_value
-                else:
-                    actual_value = ''
-                
-                result = str(actual_value) == expected_value
-                return not result if negated else result
-        
-        # Handle "true" literal (for else clauses)
-        if expression.lower() == 'true':
-            return not True if negated else True
-        
-        # If we can't evaluate the expression, return False (or True if negated)
-        return not False if negated else False
-    
-    def apply_vars(self, line: int, string: str, allow_unicode_vars: bool = False) -> Optional[str]:
-        """Replace all variables in an expression with their values.
-        
-        This matches the Ruby apply_vars implementation exactly.
-        
-        Args:
-            line: Line number for error reporting
-            string: The string to process
-            allow_unicode_vars: Whether to allow Unicode variables
-            
-        Returns:
-            The processed string, or None if there was an error
-        """
-        ret = string
-        stack_depth = 0
-        had_replacements = True
-        
-        error_occurred = False
-        
-        while had_replacements:
-            had_replacements = False
-            
-            def replace_var(match):
-                nonlocal had_replacements, error_occurred
-                vname = match.group(1)
-                v = self.vars.get(vname)
-                
-                if not v:
-                    # Check if it's a Unicode variable
-                    if self.UNICODE_VAR_NAME_REGEXP_IN.match(vname):
-                        if allow_unicode_vars:
-                            # Keep Unicode variable intact for later processing
-                            return match.group(0)
-                        else:
-                            self.mode.errors.append(Error(
-                                line, 
-                                f"In expression: {string}: making wrong use of unicode variable: {match.group(0)}. Unicode vars can only be used in source members of a rule or in the definition of another variable."
-                            ))
-                            error_occurred = True
-                            return match.group(0)  # Return original to avoid empty string
-                    else:
-                        self.mode.errors.append(Error(
-                            line,
-                            f"In expression: {string}: failed to evaluate variable: {match.group(0)}."
-                        ))
-                        error_occurred = True
-                        return match.group(0)  # Return original to avoid empty string
-                else:
-                    had_replacements = True
-                    return v.value
-            
-            # Apply variable replacement
-            ret = self.VAR_NAME_REGEXP.sub(replace_var, ret)
+        elif condition.kind == 'eq':
+            option_name = condition.name
             
-            if error_occurred:
-                return None
+            # Get actual value from trans_options or mode defaults
+            if option_name in trans_options:
+                actual_value = trans_options[option_name]
+            elif option_name in self.mode.options:
+                actual_value = self.mode.options[option_name].default_value
+            else:
+                actual_value = ''
             
-            stack_depth += 1
-            if not had_replacements:
-                break
-                
-            if stack_depth > 16:
-                self.mode.errors.append(Error(
-                    line,
-                    f"In expression: {string}: evaluation stack overflow."
-                ))
-                return None
+            result = str(actual_value) == condition.value
         
-        # Unicode variables are kept intact and will be replaced at the last moment of parsing
-        # This matches Ruby behavior exactly
-        return ret
+        # Handle "true" literal (for else clauses); anything else we can't evaluate is False
+        else:
+            result = condition.kind == 'true'
+        
+        return not result if condition.negated else result
     
     def finalize(self, trans_options: Dict[str, Any]):
         """Finalize the rule group with options, building rules and charset.
@@ -819,33 +955,19 @@ class RuleGroup:
         """
         # Reset containers (JS: vars = {}, in_charset = {}, rules = [])
         self.vars = {}
+        self._expanded_vars = {}
+        self._expanded_exprs = {}
         self.in_charset = {}
         self.rules = []
+        self._combinations = {}
         
         # Seed built-in variables (JS lines 320–336)
-        self.add_var("NULL", "", False)
-        self.add_var("NBSP", "{UNI_A0}", False)
-        self.add_var("WJ", "{UNI_2060}", False)
-        self.add_var("ZWSP", "{UNI_200B}", False)
-        self.add_var("ZWNJ", "{UNI_200C}", False)
-        self.add_var("UNDERSCORE", "{UNI_5F}", False)
-        self.add_var("ASTERISK", "{UNI_2A}", False)
-        self.add_var("COMMA", "{UNI_2C}", False)
-        self.add_var("LPAREN", "{UNI_28}", False)
-        self.add_var("RPAREN", "{UNI_29}", False)
-        self.add_var("LBRACKET", "{UNI_5B}", False)
-        self.add_var("RBRACKET", "{UNI_5D}", False)
-        
-        # Descend the IF tree to collect rules (JS: descend_if_tree)
-        self.descend_if_tree(self.root_code_block, trans_options)
+        self.vars.update(_DEFAULT_VARS)
         
-        # Build in_charset from generated rules (JS lines 341–358)
-        for rule in self.rules:
-            for sub_rule in rule.sub_rules:
-                for inchar in sub_rule.src_combination:
-                    # Ignore word boundary markers
-                    if inchar != "|" and inchar != "\u0000":
-                        self.in_charset[inchar] = self
+        # Descend the IF tree to collect rules (JS: descend_if_tree).
+        # in_charset (JS lines 341–358) is filled in by _add_sub_rule as the
+        # rules generate their sub-rules.
+        self.descend_if_tree(self.root_code_block, trans_options)
 
     def __str__(self) -> str:
         """String representation of the rule group."""
@@ -23,6 +23,8 @@ class Sheaf:
     
     SHEAF_SEPARATOR = "*"
     
+    __slots__ = ('linkable', 'sheaf_chain', 'mode', 'rule', 'is_src', 'expression', 'fragments')
+    
     def __init__(self, sheaf_chain, expression: str, linkable: bool):
         """Initialize a sheaf.
         
@@ -35,6 +37,8 @@ class Sheaf:
         self.sheaf_chain = sheaf_chain
         self.mode = sheaf_chain.mode
         self.rule = sheaf_chain.rule
+        # Plain flag copied from the chain; fragments read it while being built
+        self.is_src: bool = sheaf_chain.is_src
         self.expression = expression
         
         # Split members using "*" separator, KEEP NULL MEMBERS (this is legal)
@@ -46,14 +50,6 @@ class Sheaf:
         # Build the fragments inside
         self.fragments = [Fragment(self, fragment_exp) for fragment_exp in fragment_exps]
     
-    def is_src(self) -> bool:
-        """Check if this is a source sheaf."""
-        return self.sheaf_chain.is_src
-    
-    def is_dst(self) -> bool:
-        """Check if this is a destination sheaf."""
-        return self.sheaf_chain.is_dst
-    
     def __str__(self) -> str:
         """String representation of the sheaf."""
         return f"<Sheaf '{self.expression}' (linkable={self.linkable}): {len(self.fragments)} fragments>"
@@ -34,6 +34,8 @@ class SheafChain:
     SHEAF_REGEXP_IN = re.compile(r'\[(.*?)\]')
     SHEAF_REGEXP_OUT = re.compile(r'(\[.*?\])')
     
+    __slots__ = ('rule', 'mode', 'is_src', 'expression', 'sheaves')
+    
     def __init__(self, rule, expression: str, is_src: bool):
         """Initialize a sheaf chain.
         
@@ -48,45 +50,23 @@ class SheafChain:
         self.expression = expression
         
         # Split expression with '[...]' patterns. e.g. 'b[a*c*d]e' => [b, a*c*d, e]
-        sheaf_exps = self.SHEAF_REGEXP_OUT.split(expression)
-        sheaf_exps = [elt.strip() for elt in sheaf_exps if elt.strip()]
-        
-        sheaf_exps = [self._parse_sheaf_expression(sheaf_exp) for sheaf_exp in sheaf_exps]
-        
-        # Create sheaf objects
-        self.sheaves = [Sheaf(self, sd['exp'], sd['linkable']) for sd in sheaf_exps]
+        # The split keeps the '[...]' pieces whole, which is how linkable
+        # sheaves are told apart from the text around them
+        self.sheaves = []
+        for sheaf_exp in self.SHEAF_REGEXP_OUT.split(expression):
+            sheaf_exp = sheaf_exp.strip()
+            if not sheaf_exp:
+                continue
+            linkable = sheaf_exp[0] == '[' and sheaf_exp[-1] == ']'
+            if linkable:
+                # Take the interior of the brackets
+                sheaf_exp = sheaf_exp[1:-1].strip()
+            self.sheaves.append(Sheaf(self, sheaf_exp, linkable))
         
         # Ensure we have at least one sheaf
         if not self.sheaves:
             self.sheaves = [Sheaf(self, "", False)]
     
-    def _parse_sheaf_expression(self, sheaf_exp: str) -> dict:
-        """Parse a sheaf expression to determine if it's linkable.
-        
-        Args:
-            sheaf_exp: Sheaf expression string
-            
-        Returns:
-            Dict with 'exp' and 'linkable' keys
-        """
-        match = self.SHEAF_REGEXP_IN.match(sheaf_exp)
-        linkable = False
-        
-        if match:
-            # Take the interior of the brackets it was a [...] expression
-            sheaf_exp = match.group(1)
-            linkable = True
-        
-        return {'exp': sheaf_exp.strip(), 'linkable': linkable}
-    
-    def is_src(self) -> bool:
-        """Check if this is a source chain."""
-        return self.is_src
-    
-    def is_dst(self) -> bool:
-        """Check if this is a destination chain."""
-        return not self.is_src
-    
     def __str__(self) -> str:
         """String representation of the sheaf chain."""
         return f"<SheafChain '{self.expression}' (src={self.is_src}): {len(self.sheaves)} sheaves>"
@@ -5,7 +5,7 @@ all combinations from a SheafChain using an iterator pattern.
 """
 
 from __future__ import annotations
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import itertools
 
 
@@ -32,6 +32,11 @@ class SheafChainIterator:
         # An array of counters, one for each sheaf, to increment on fragments
         self.iterators = [0] * len(self.sizes)
         
+        # Combinations of every fragment, indexed by [sheaf][fragment]
+        # (fragments do not change once the chain is built)
+        self._frag_combos = [[fragment.combinations for fragment in sheaf.fragments]
+                             for sheaf in sheaf_chain.sheaves]
+        
         # Construct the identity array
         identity_cross_array = list(range(len(sheaf_chain.sheaves)))
         
@@ -52,6 +57,10 @@ class SheafChainIterator:
         # Construct the cross array if cross_schema is provided
         if cross_schema:
             self._construct_cross_array(cross_schema, iterable_idxs, prototype_array)
+        
+        # (sheaf index, size) pairs in the order iterate() advances them;
+        # the cross array is final at this point
+        self._advance_order = [(i, self.sizes[i]) for i in self.cross_array]
     
     def _construct_cross_array(self, cross_schema: str, iterable_idxs: List[int], prototype_array: List[int]):
         """Construct the cross array for cross schema processing.
@@ -78,7 +87,7 @@ class SheafChainIterator:
         
         # Parse numeric schema (Ruby: cross_schema.split(",").map{ |i| i.to_i - 1 })
         try:
-            schema_array = [int(i.strip()) - 1 for i in cross_schema.split(",")]
+            schema_array = [int(i) - 1 for i in cross_schema.split(",")]  # int() ignores surrounding spaces
         except ValueError:
             self.errors.append(f"Invalid cross schema: {cross_schema}")
             return
@@ -91,9 +100,9 @@ class SheafChainIterator:
             self.errors.append(f"{it_count} linkable sheaves found in right predicate, but {ca_count} elements in cross rule.")
             return
         
-        # Verify permutation is valid (Ruby: it_identity_array != cross_schema.sort)
-        it_identity_array = list(range(it_count))
-        if sorted(it_identity_array) != sorted(schema_array):
+        # Verify permutation is valid (Ruby: it_identity_array != cross_schema.sort);
+        # counts already match, so every index must appear exactly once
+        if set(schema_array) != set(range(it_count)):
             self.errors.append("Cross rule schema should be a permutation of the identity (it should contain 1,2,..,n numbers once and only once).")
             return
         
@@ -111,22 +120,36 @@ class SheafChainIterator:
         if not self.prototype:
             self.prototype = 'CONST'
     
+    def __iter__(self) -> Iterator[List[List[str]]]:
+        """Yield the combinations of every iterator state, in iterate() order.
+        
+        Starts from the first state and leaves the counters back at zero,
+        as iterate() does when it wraps around.
+        """
+        iterators = self.iterators
+        # iterate() advances the counter at cross_array[0] fastest, while
+        # product() varies its last range fastest
+        order = self.cross_array[::-1]
+        for state in itertools.product(*[range(self.sizes[i]) for i in order]):
+            for i, value in zip(order, state):
+                iterators[i] = value
+            yield self.combinations()
+        iterators[:] = [0] * len(iterators)
+    
     def iterate(self) -> bool:
         """Move to the next combination.
         
         Returns:
             True if there are more combinations, False if we've wrapped around
         """
-        pos = 0
-        while pos < len(self.sizes):
-            realpos = self.cross_array[pos]
-            self.iterators[realpos] += 1
-            
-            if self.iterators[realpos] >= self.sizes[realpos]:
-                self.iterators[realpos] = 0
-                pos += 1
-            else:
+        iterators = self.iterators
+        for realpos, size in self._advance_order:
+            value = iterators[realpos] + 1
+            if value < size:
+                iterators[realpos] = value
                 return True
+            # This counter wraps, carry over to the next one
+            iterators[realpos] = 0
         
         # Wrapped!
         return False
@@ -135,7 +158,16 @@ class SheafChainIterator:
         """Calculate all combinations for the chain, for the current iterator value.
         
         Returns:
-            List of combinations (each combination is a list of strings)
+            List of combinations (each combination is a list of strings).
+            Never empty, so callers may index ``[0]`` directly.
+        """
+        return list(self.iter_combinations())
+    
+    def iter_combinations(self) -> Iterator[List[str]]:
+        """Yield the combinations for the current iterator value one by one.
+        
+        Same order as combinations(), without building the whole product;
+        callers needing only the first one can stop there.
         """
         # Build fragments array in the natural sheaf order.
         #
@@ -153,24 +185,22 @@ class SheafChainIterator:
         #
         # To match JS behavior, we resolve fragments purely by sheaf index
         # and let cross_array affect only iterator progression.
-        resolved = []
-        for idx, sheaf in enumerate(self.sheaf_chain.sheaves):
-            fragment_index = self.iterators[idx]
-            fragment = sheaf.fragments[fragment_index]
-            resolved.append(fragment.combinations)
+        resolved = [combos[fragment_index]
+                    for combos, fragment_index in zip(self._frag_combos, self.iterators)]
         
         # Calculate Cartesian product of all fragment combinations
         if not resolved:
-            return [[""]]
-        
-        # Start with first fragment's combinations
-        result = resolved[0]
-        
-        # Multiply with each subsequent fragment's combinations
-        for i in range(1, len(resolved)):
-            result = [combo1 + combo2 for combo1 in result for combo2 in resolved[i]]
+            yield [""]
+            return
+        if len(resolved) == 1:
+            yield from resolved[0]
+            return
         
-        return result
+        # Each element of the product holds one token list per sheaf;
+        # concatenate them in sheaf order
+        chain = itertools.chain.from_iterable
+        for parts in itertools.product(*resolved):
+            yield list(chain(parts))
     
     def __str__(self) -> str:
         """String representation of the iterator."""
@@ -14,8 +14,11 @@ class SubRule:
     For example, from rule "[a*b][c*d] => [x*y][1*2]" we might get:
     src_combination = ["a", "c"]
     dst_combination = ["x", "1"]
+    src_path = "ac"
     """
     
+    __slots__ = ('rule', 'src_combination', 'dst_combination', 'src_path')
+    
     def __init__(self, rule, src_combination: List[str], dst_combination: List[str]):
         """Initialize a subrule.
         
@@ -27,9 +30,10 @@ class SubRule:
         self.rule = rule
         self.src_combination = src_combination
         self.dst_combination = dst_combination
+        # Path of this sub-rule in the transcription tree
+        self.src_path = "".join(src_combination)
     
     def __str__(self) -> str:
         """String representation of the subrule."""
-        src_str = "".join(self.src_combination)
         dst_str = " ".join(self.dst_combination)
-        return f"<SubRule '{src_str}' => '{dst_str}'>"
+        return f"<SubRule '{self.src_path}' => '{dst_str}'>"
@@ -5,7 +5,8 @@ rule groups and applies transcription rules using a tree-based algorithm.
 """
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 
 from .transcription_tree_node import TranscriptionTreeNode
 from .rule_group import RuleGroup
@@ -25,6 +26,13 @@ class TranscriptionProcessor:
     WORD_BOUNDARY_LANG = "_"      # Language boundary  
     WORD_BOUNDARY_TREE = "\u0000" # Tree boundary (null character)
     
+    # Characters that end the current word, with the token each one emits
+    # (an empty token means the character is dropped without a break)
+    BREAK_TOKENS = {" ": "*SPACE", "\t": "*SPACE", "\r": "", "\n": "*LF"}
+    
+    # Number of distinct words whose tokens are kept, least recently used first out
+    WORD_CACHE_SIZE = 4096
+    
     def __init__(self, mode: Mode):
         """Initialize the processor for a specific mode.
         
@@ -34,7 +42,11 @@ class TranscriptionProcessor:
         self.mode: Mode = mode
         self.rule_groups: Dict[str, RuleGroup] = {}
         self.in_charset: Dict[str, RuleGroup] = {}  # Maps characters to rule groups
+        # in_charset without the break characters, which always end a word
+        self._char_groups: Dict[str, RuleGroup] = {}
         self.transcription_tree: Optional[TranscriptionTreeNode] = None
+        # Tokens already produced for each word, valid for the current tree
+        self._word_cache: OrderedDict[str, Tuple[str, ...]] = OrderedDict()
     
     def add_rule_group(self, name: str, rule_group: RuleGroup):
         """Add a rule group to the processor.
@@ -63,6 +75,7 @@ class TranscriptionProcessor:
         
         # Build the transcription tree
         self._build_transcription_tree()
+        self._word_cache = OrderedDict()
     
     def _build_input_charset(self):
         """Build mapping of input characters to rule groups.
@@ -91,23 +104,29 @@ class TranscriptionProcessor:
                     self.mode.errors.append(Error(-1, f"Group {rg_name} uses input character '{char}' which is also used by group {group_for_char.name}. Input charsets should not intersect between groups."))
                 else:
                     self.in_charset[char] = group
+        
+        # Break characters win over any group that lists them
+        self._char_groups = {
+            char: group for char, group in self.in_charset.items()
+            if char not in self.BREAK_TOKENS
+        }
     
     def _build_transcription_tree(self):
         """Build the transcription tree from all rules."""
         self.transcription_tree = TranscriptionTreeNode()
+        add_subpath = self.transcription_tree.add_subpath
         
         # Add word boundaries (match Ruby exactly)
-        self.transcription_tree.add_subpath(self.WORD_BOUNDARY_TREE, [""])
-        self.transcription_tree.add_subpath(self.WORD_BREAKER, [""])
+        add_subpath(self.WORD_BOUNDARY_TREE, [""])
+        add_subpath(self.WORD_BREAKER, [""])
         
         # Add all rules from all rule groups
         for rule_group in self.rule_groups.values():
             for rule in rule_group.rules:
-                # Add all sub-rules from this rule
+                # Add all sub-rules from this rule, the path being the
+                # source combination
                 for sub_rule in rule.sub_rules:
-                    # Create path from source combination
-                    path = "".join(sub_rule.src_combination)
-                    self.transcription_tree.add_subpath(path, sub_rule.dst_combination)
+                    add_subpath(sub_rule.src_path, sub_rule.dst_combination)
     
     def transcribe(self, text: str, debug_context: Optional[Any] = None) -> List[str]:
         """Transcribe text using the rule tree.
@@ -125,35 +144,38 @@ class TranscriptionProcessor:
         
         result = []
         current_group = None
-        accumulated_word = ""
+        # Characters of the current word, joined only when it is flushed
+        word_chars: List[str] = []
+        add_char = word_chars.append
+        char_groups = self._char_groups
+        break_tokens = self.BREAK_TOKENS
         
         for char in text:
-            if char in (" ", "\t"):
-                # Word boundary - transcribe accumulated word
-                result.extend(self._transcribe_word(accumulated_word, debug_context))
-                result.append("*SPACE")
-                accumulated_word = ""
-            elif char == "\r":
-                # Ignore carriage return
+            group = char_groups.get(char)
+            if group is not None and group is current_group:
+                # Same group - keep accumulating
+                add_char(char)
                 continue
-            elif char == "\n":
-                # Line feed boundary
-                result.extend(self._transcribe_word(accumulated_word, debug_context))
-                result.append("*LF")
-                accumulated_word = ""
+            
+            break_token = break_tokens.get(char)
+            if break_token is not None:
+                # Word boundary (space, tab, line feed); carriage return is ignored
+                if break_token:
+                    result.extend(self._transcribe_word("".join(word_chars), debug_context))
+                    result.append(break_token)
+                    word_chars.clear()
+            elif group is current_group:
+                # Characters outside every group stay together
+                add_char(char)
             else:
-                # Regular character
-                char_group = self.in_charset.get(char)
-                if char_group == current_group:
-                    accumulated_word += char
-                else:
-                    # Group changed - transcribe previous word
-                    result.extend(self._transcribe_word(accumulated_word, debug_context))
-                    current_group = char_group
-                    accumulated_word = char
+                # Group changed - transcribe previous word
+                result.extend(self._transcribe_word("".join(word_chars), debug_context))
+                current_group = group
+                word_chars.clear()
+                add_char(char)
         
         # Transcribe any remaining word
-        result.extend(self._transcribe_word(accumulated_word, debug_context))
+        result.extend(self._transcribe_word("".join(word_chars), debug_context))
         
         return result
     
@@ -170,33 +192,38 @@ class TranscriptionProcessor:
         if not word:
             return []
         
+        # Words recur a lot in prose; reuse earlier results unless tracing
+        word_cache = self._word_cache
+        if debug_context is None:
+            cached = word_cache.get(word)
+            if cached is not None:
+                word_cache.move_to_end(word)
+                return list(cached)
+        
         # Add word boundaries for matching (match Ruby exactly)
         word_with_boundaries = self.WORD_BOUNDARY_TREE + word + self.WORD_BOUNDARY_TREE
         
         result = []
-        remaining = word_with_boundaries
-        original_word = word_with_boundaries
+        transcribe = self.transcription_tree.transcribe
+        position = 0
         
-        while remaining:
+        # Walk the word by offset rather than re-slicing what remains
+        while position < len(word_with_boundaries):
             # Find longest match
-            tokens, consumed = self.transcription_tree.transcribe(remaining)
-            
-            # Get the actual characters that were matched
-            eaten = original_word[:consumed]
-            original_word = original_word[consumed:]
-            
-            # Remove matched characters from remaining
-            remaining = remaining[consumed:]
+            tokens, consumed = transcribe(word_with_boundaries, position)
+            position += consumed
             
             # Add to result
             result.extend(tokens)
             
             # Add debug trace if context provided
             if debug_context is not None:
-                # TODO: Fix debug context method call
-                # debug_context.add_processor_path(eaten, tokens, tokens)
-                pass
+                eaten = word_with_boundaries[position - consumed:position]
+                debug_context.add_processor_path(eaten, tokens, tokens)
         
+        word_cache[word] = tuple(result)
+        if len(word_cache) > self.WORD_CACHE_SIZE:
+            word_cache.popitem(last=False)
         return result
     
     def __str__(self) -> str:
@@ -16,6 +16,8 @@ class TranscriptionTreeNode:
     and paths through the tree represent complete patterns.
     """
     
+    __slots__ = ('character', 'replacement', 'siblings')
+    
     def __init__(self, character: Optional[str] = None, replacement: Optional[List[str]] = None):
         """Initialize a tree node.
         
@@ -38,61 +40,52 @@ class TranscriptionTreeNode:
             source: The source pattern to match
             replacement: The replacement tokens
         """
+        # An empty path must not make this node effective
         if not source:
             return
         
-        # Get first character
-        first_char = source[0]
-        
-        # Get or create sibling for this character
-        if first_char not in self.siblings:
-            self.siblings[first_char] = TranscriptionTreeNode(first_char, None)
-        
-        sibling = self.siblings[first_char]
+        # Walk down one character at a time, creating missing siblings
+        node = self
+        for char in source:
+            sibling = node.siblings.get(char)
+            if sibling is None:
+                sibling = node.siblings[char] = TranscriptionTreeNode(char, None)
+            node = sibling
         
-        if len(source) == 1:
-            # This is the end of the pattern - mark as effective
-            sibling.replacement = replacement
-        else:
-            # Continue building the path
-            sibling.add_subpath(source[1:], replacement)
+        # This is the end of the pattern - mark as effective
+        node.replacement = replacement
     
-    def transcribe(self, string: str, chain: Optional[List[TranscriptionTreeNode]] = None) -> Tuple[List[str], int]:
+    def transcribe(self, string: str, start: int = 0) -> Tuple[List[str], int]:
         """Transcribe a string using the tree.
         
         This method walks the tree trying to match the longest possible
-        pattern from the input string.
+        pattern from the input string, then falls back to the deepest
+        effective node it went through.
         
         Args:
             string: The input string to transcribe
-            chain: The chain of nodes visited (for backtracking)
+            start: Position in string where matching begins
         
         Returns:
             A tuple of (replacement_tokens, characters_consumed)
         """
-        if chain is None:
-            chain = []
-        
-        chain.append(self)
-        
-        # Try to continue matching
-        if string:
-            first_char = string[0]
-            sibling = self.siblings.get(first_char)
-            
-            if sibling:
-                # Continue down the tree
-                return sibling.transcribe(string[1:], chain)
+        node = self
+        replacement = None
+        consumed = 0
         
-        # We've reached the end of matching - backtrack to find effective node
-        while len(chain) > 1:
-            last_node = chain.pop()
-            if last_node.is_effective():
-                # Found a match! Return the replacement and how many chars we consumed
-                return last_node.replacement, len(chain)
+        for position in range(start, len(string)):
+            node = node.siblings.get(string[position])
+            if node is None:
+                break
+            if node.replacement is not None:
+                # Longest match so far
+                replacement = node.replacement
+                consumed = position - start + 1
         
-        # No match found - return unknown character marker
-        return ["*UNKNOWN"], 1
+        if replacement is None:
+            # No match found - return unknown character marker
+            return ["*UNKNOWN"], 1
+        return replacement, consumed
     
     def __str__(self) -> str:
         """String representation of the node."""
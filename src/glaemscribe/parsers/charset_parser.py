@@ -32,6 +32,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Union, Any
 import os
+import sys
 
 from .glaeml import Parser, Document, Node, Error
 from ..core.charset import Charset as CoreCharset
@@ -72,11 +73,14 @@ class Char:
         (for Unicode-native charsets like FreeMonoTengwar) or legacy
         font mapping (for DS fonts). Sets the str_value attribute.
         """
-        # Check if this is a Unicode-native charset (like FreeMonoTengwar)
-        # by checking the charset name if available
-        is_unicode_charset = False
-        if hasattr(self.charset, 'charset') and self.charset.charset:
-            is_unicode_charset = 'freemono' in self.charset.charset.name.lower()
+        # Check if this is a Unicode-native charset (like FreeMonoTengwar);
+        # CharsetParser.parse works this out once per file
+        is_unicode_charset = getattr(self.charset, '_is_unicode_native', None)
+        if is_unicode_charset is None:
+            # Not known up front, fall back to the charset name if available
+            is_unicode_charset = False
+            if hasattr(self.charset, 'charset') and self.charset.charset:
+                is_unicode_charset = 'freemono' in self.charset.charset.name.lower()
         
         if self.code >= 0xE000 or is_unicode_charset:
             # Direct Unicode mapping for Unicode-native charsets
@@ -147,24 +151,23 @@ class VirtualChar:
         Maps trigger character names to result character objects.
         """
         self.lookup_table = {}
+        get_char = self.charset._get_character_by_name
         
         for vc_class in self.classes:
-            result_char_name = vc_class.target
-            trigger_char_names = vc_class.triggers
+            # Find the result character in the charset, once per class
+            result_char = get_char(vc_class.target)
+            if result_char is None:
+                # Ruby version would add an error here
+                continue
             
-            for trigger_char_name in trigger_char_names:
+            for trigger_char_name in vc_class.triggers:
                 if trigger_char_name in self.lookup_table:
                     # Ruby version would add an error here
                     continue
                 
-                # Find the result character in the charset
-                result_char = self.charset._get_character_by_name(result_char_name)
-                trigger_char = self.charset._get_character_by_name(trigger_char_name)
+                trigger_char = get_char(trigger_char_name)
                 
-                if result_char is None:
-                    # Ruby version would add an error here
-                    continue
-                elif trigger_char is None:
+                if trigger_char is None:
                     # Ruby version would add an error here
                     continue
                 elif isinstance(trigger_char, VirtualChar):
@@ -292,6 +295,10 @@ class CharsetParser:
         self.charset: Optional[CoreCharset] = None
         self.chars: List[Union[Char, VirtualChar]] = []
         self.errors: List[Error] = []
+        # Maps every name to the first char (or virtual char) defining it
+        self._name_index: Dict[str, Union[Char, VirtualChar]] = {}
+        # Whether the charset being parsed is Unicode-native (None: unknown)
+        self._is_unicode_native: Optional[bool] = None
     
     def parse(self, file_path: str) -> CoreCharset:
         """Parse a .cst charset file and return a Charset object.
@@ -338,12 +345,14 @@ class CharsetParser:
         """
         self.errors = []
         self.chars = []
+        self._name_index = {}
         
         # Extract charset name from filename
         charset_name = os.path.splitext(os.path.basename(file_path))[0]
         
         # Create the core charset object
         self.charset = CoreCharset(name=charset_name, version="1.0.0")
+        self._is_unicode_native = 'freemono' in charset_name.lower()
         
         # Read and parse the file
         try:
@@ -372,20 +381,32 @@ class CharsetParser:
         if not doc.root_node:
             return
         
+        # Collect every definition in one pre-order walk of the tree, in the
+        # order gpath() would find them
+        elements: Dict[str, List[Node]] = {"char": [], "sequence": [], "virtual": [], "swap": []}
+        stack = doc.root_node.children[::-1]
+        while stack:
+            node = stack.pop()
+            if node.is_element():
+                found = elements.get(node.name)
+                if found is not None:
+                    found.append(node)
+            stack.extend(node.children[::-1])
+        
         # Process character definitions
-        for char_element in doc.root_node.gpath("char"):
+        for char_element in elements["char"]:
             self._process_char(char_element)
         
         # Process sequence characters (if any)
-        for seq_element in doc.root_node.gpath("sequence"):
+        for seq_element in elements["sequence"]:
             self._process_sequence(seq_element)
         
         # Process virtual characters
-        for virtual_element in doc.root_node.gpath("virtual"):
+        for virtual_element in elements["virtual"]:
             self._process_virtual(virtual_element)
         
         # Process swaps (if any)
-        for swap_element in doc.root_node.gpath("swap"):
+        for swap_element in elements["swap"]:
             self._process_swap(swap_element)
     
     def _process_char(self, char_element: Node):
@@ -413,7 +434,9 @@ class CharsetParser:
             code = int(code_str, 16)  # Always base 16, matching Ruby and JS behavior
             
             # Get character names (everything after the code point)
-            names = [name.strip() for name in char_element.args[1:] if name.strip() and name.strip() != '?']
+            # Names are interned: they key every charset lookup table
+            names = [sys.intern(name) for name in (arg.strip() for arg in char_element.args[1:])
+                     if name and name != '?']
             
             if not names:
                 return  # Skip characters without valid names
@@ -432,6 +455,7 @@ class CharsetParser:
             # Add to core charset's character dictionary
             for name in names:
                 self.charset.characters[name] = char
+                self._name_index.setdefault(name, char)
                 
         except ValueError as e:
             self.errors.append(Error(char_element.line, f"Invalid code point '{char_element.args[0]}': {e}"))
@@ -450,7 +474,8 @@ class CharsetParser:
         Args:
             virtual_element: AST node containing virtual character definition
         """
-        names = [name.strip() for name in virtual_element.args if name.strip() and name.strip() != '?']
+        names = [sys.intern(name) for name in (arg.strip() for arg in virtual_element.args)
+                 if name and name != '?']
         
         if not names:
             return  # Skip virtual chars without valid names
@@ -464,13 +489,15 @@ class CharsetParser:
             if not class_element.args:
                 continue
             
-            target = class_element.args[0]
-            triggers = [t.strip() for t in class_element.args[1:] if t.strip() and t.strip() != '?']
+            target = sys.intern(class_element.args[0])
+            triggers = [sys.intern(t) for t in (arg.strip() for arg in class_element.args[1:])
+                        if t and t != '?']
             
             # Also check for triggers in the body text
             for child in class_element.children:
                 if child.is_text():
-                    text_triggers = [t.strip() for t in child.args[0].split() if t.strip() and t.strip() != '?']
+                    # split() already drops surrounding whitespace and empty tokens
+                    text_triggers = [sys.intern(t) for t in child.args[0].split() if t != '?']
                     triggers.extend(text_triggers)
             
             if triggers:
@@ -501,6 +528,7 @@ class CharsetParser:
         for name in names:
             # Store the actual VirtualChar object for proper resolution
             self.charset.virtual_chars[name] = virtual_char
+            self._name_index.setdefault(name, virtual_char)
     
     def _process_swap(self, swap_element: Node):
         """Process a swap definition."""
@@ -508,15 +536,15 @@ class CharsetParser:
         # We'll also accept targets coming from text children if args are sparse
         if not swap_element.args:
             return
-        trigger = swap_element.args[0]
+        trigger = sys.intern(swap_element.args[0])
         targets: List[str] = []
         # Collect from inline args
         if len(swap_element.args) > 1:
-            targets.extend([t for t in swap_element.args[1:] if t and t != '?'])
+            targets.extend([sys.intern(t) for t in swap_element.args[1:] if t and t != '?'])
         # Collect from text children
         for child in swap_element.children:
             if child.is_text() and child.args and child.args[0]:
-                parts = [p for p in child.args[0].split() if p and p != '?']
+                parts = [sys.intern(p) for p in child.args[0].split() if p != '?']
                 targets.extend(parts)
         if not targets:
             return
@@ -532,30 +560,32 @@ class CharsetParser:
         """
         if not seq_element.args:
             return
-        name = seq_element.args[0]
+        name = sys.intern(seq_element.args[0])
         tokens: List[str] = []
         # From inline args
         if len(seq_element.args) > 1:
-            tokens.extend([t for t in seq_element.args[1:] if t and t != '?'])
+            tokens.extend([sys.intern(t) for t in seq_element.args[1:] if t and t != '?'])
         # From text children
         for child in seq_element.children:
             if child.is_text() and child.args and child.args[0]:
-                parts = [p for p in child.args[0].split() if p and p != '?']
+                parts = [sys.intern(p) for p in child.args[0].split() if p != '?']
                 tokens.extend(parts)
         if not tokens:
             return
         self.charset.sequences[name] = tokens
     
     def _get_character_by_name(self, name: str) -> Optional[Char]:
-        """Get a character object by name."""
-        for char in self.chars:
-            if name in char.names:
-                return char
-        return None
+        """Get a character object by name.
+        
+        The first definition of a name wins, as when scanning self.chars.
+        """
+        return self._name_index.get(name)
     
     def _finalize(self):
         """Finalize the charset by building lookup tables."""
-        # Finalize all virtual characters to build their lookup tables
+        # Finalize all virtual characters to build their lookup tables. This
+        # waits until the whole file is read, since a class may name a
+        # character defined further down (as in Ruby)
         for char in self.chars:
             if isinstance(char, VirtualChar):
                 char.finalize()
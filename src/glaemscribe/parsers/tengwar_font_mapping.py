@@ -140,13 +140,13 @@ def map_font_code_to_unicode(code_point: int) -> str:
     Returns:
         Unicode Tengwar character, or fallback Unicode character
     """
-    if code_point in FONT_TO_UNICODE:
-        return FONT_TO_UNICODE[code_point]
-    else:
-        # Fallback: map to Private Use Area for unmapped font characters
-        # This ensures we get Unicode characters rather than ASCII
-        # Use a simple offset from E1000 for unmapped characters
-        if 0x20 <= code_point <= 0x7F:  # Printable ASCII range
-            return chr(0xE1000 + code_point)
-        else:
-            return chr(code_point)
+    mapped = FONT_TO_UNICODE.get(code_point)
+    if mapped is not None:
+        return mapped
+    
+    # Fallback: map to Private Use Area for unmapped font characters
+    # This ensures we get Unicode characters rather than ASCII
+    # Use a simple offset from E1000 for unmapped characters
+    if 0x20 <= code_point <= 0x7F:  # Printable ASCII range
+        return chr(0xE1000 + code_point)
+    return chr(code_point)
@@ -1,5 +1,6 @@
 """Tests for glaemscribe.parsers.charset_parser (focused, no real .cst files)."""
 
+import sys
 import types
 
 from glaemscribe.core.charset import Charset as CoreCharset
@@ -207,3 +208,98 @@ def test_process_sequence_registers_sequence_tokens():
     tokens = parser.charset.sequences["SEQ_NAME"]
     # Tokens from args and text, '?' filtered
     assert tokens == ["A", "B", "C", "D"]
+
+
+def test_get_character_by_name_uses_first_definition():
+    parser = CharsetParser()
+    parser.charset = CoreCharset(name="tengwar_freemono", version="1.0.0")
+
+    parser._process_char(_FakeNode("char", args=["E000", "TINCO", "T"]))
+    parser._process_char(_FakeNode("char", args=["E001", "PARMA", "T"]))
+    parser._process_virtual(_FakeNode("virtual", args=["TEHTA", "PARMA"]))
+
+    tinco, parma, tehta = parser.chars
+    assert parser._get_character_by_name("TINCO") is tinco
+    # A name defined twice resolves to its first definition
+    assert parser._get_character_by_name("T") is tinco
+    assert parser._get_character_by_name("PARMA") is parma
+    assert parser._get_character_by_name("TEHTA") is tehta
+    assert parser._get_character_by_name("MISSING") is None
+
+
+def test_parse_detects_unicode_native_charset_once(tmp_path, monkeypatch):
+    def fail_map_font_code_to_unicode(code):  # pragma: no cover - must not be called
+        raise AssertionError(code)
+
+    monkeypatch.setattr(
+        "glaemscribe.parsers.charset_parser.map_font_code_to_unicode",
+        fail_map_font_code_to_unicode,
+    )
+    path = tmp_path / "my_freemono.cst"
+    path.write_text("\\char 41 LETTER_A\n", encoding="utf-8")
+
+    parser = CharsetParser()
+    charset = parser.parse(str(path))
+
+    assert parser._is_unicode_native is True
+    assert charset.characters["LETTER_A"].str_value == "A"
+
+
+def test_virtual_char_finalize_resolves_each_class_target_once():
+    fake_parser = _make_fake_parser("tengwar_freemono")
+    lookups = []
+    by_name = fake_parser._get_character_by_name
+
+    def counting_lookup(name):
+        lookups.append(name)
+        return by_name(name)
+
+    fake_parser._get_character_by_name = counting_lookup
+    tinco = Char(line=1, code=0xE000, names=["TINCO"], str_value="", charset=fake_parser)
+    parma = Char(line=2, code=0xE001, names=["PARMA"], str_value="", charset=fake_parser)
+    ext = Char(line=3, code=0xE002, names=["EXT"], str_value="", charset=fake_parser)
+    fake_parser._chars_by_name.update(TINCO=tinco, PARMA=parma, EXT=ext)
+
+    vchar = VirtualChar(
+        line=10,
+        names=["VC"],
+        classes=[
+            VirtualClass(target="EXT", triggers=["TINCO", "PARMA"]),
+            VirtualClass(target="MISSING", triggers=["TINCO"]),
+        ],
+        charset=fake_parser,
+    )
+    vchar.finalize()
+
+    assert lookups == ["EXT", "TINCO", "PARMA", "MISSING"]
+    assert vchar["TINCO"] is ext and vchar["PARMA"] is ext
+
+
+def test_process_char_interns_names():
+    parser = CharsetParser()
+    parser.charset = CoreCharset(name="tengwar_freemono", version="1.0.0")
+    name = "".join(["TIN", "CO"])  # a fresh, non-interned string
+
+    parser._process_char(_FakeNode("char", args=["E000", name]))
+
+    assert parser.chars[0].names[0] is sys.intern("TINCO")
+
+
+def test_parse_processes_chars_before_virtuals_in_one_walk(tmp_path):
+    path = tmp_path / "tengwar_freemono.cst"
+    path.write_text(
+        "\\beg virtual TEHTA\n"
+        "  \\class EXT TINCO\n"
+        "\\end\n"
+        "\\char E000 TINCO\n"
+        "\\char E001 EXT TEHTA\n",
+        encoding="utf-8",
+    )
+
+    parser = CharsetParser()
+    charset = parser.parse(str(path))
+
+    assert [type(c).__name__ for c in parser.chars] == ["Char", "Char", "VirtualChar"]
+    # Chars are registered first, so they win over a later virtual of the same name
+    assert parser._get_character_by_name("TEHTA") is charset.characters["EXT"]
+    assert charset.virtual_chars["TEHTA"]["TINCO"] is charset.characters["EXT"]
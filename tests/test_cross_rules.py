@@ -84,6 +84,15 @@ class TestCrossRules:
         rule = self.rule_group.rules[0]
         assert rule.cross_schema == "3,1,2"
     
+    def test_incompatible_rule_error_reported_once(self):
+        """Prototype mismatch errors reach the mode exactly once."""
+        self.rule_group._process_code_line("[a*b] --> [x*y*z]", 1)
+        
+        rule = self.rule_group.rules[0]
+        assert len(rule.errors) == 1
+        matching = [e for e in self.mode.errors if "not compatible" in str(e)]
+        assert len(matching) == 1
+    
     def test_cross_rule_with_unicode(self):
         """Test cross rules work with Unicode characters."""
         # Add the rule to the code block (proper architecture)
@@ -50,3 +50,21 @@ def test_preprocessor_apply_and_clear():
 
     pre.clear()
     assert "0 operators" in str(pre)
+
+
+def test_rx_substitute_pre_processor_operator_reuses_compiled_pattern():
+    from glaemscribe.core.pre_processor_operators import RxSubstitutePreProcessorOperator
+    from glaemscribe.parsers.glaeml import Node, NodeType
+
+    element = Node(1, NodeType.ELEMENT_INLINE, "rx_substitute", ["(a)(b)", "\\2\\1"])
+    op = RxSubstitutePreProcessorOperator(None, element)
+
+    assert op.apply("abab") == "baba"
+    regex = op._regex
+    assert op.apply("xab") == "xba"
+    assert op._regex is regex
+
+    # A different pattern is compiled afresh
+    element.args = ["a+", "A"]
+    assert op.apply("caaat") == "cAt"
+    assert op._regex is not regex
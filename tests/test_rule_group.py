@@ -7,7 +7,6 @@ validate small, self-contained pieces of RuleGroup behavior.
 import types
 
 from glaemscribe.core.rule_group import RuleGroup
-from glaemscribe.core.transcription_processor import TranscriptionProcessor
 
 
 class _FakeMode:
@@ -62,49 +61,184 @@ def test_apply_vars_unknown_and_unicode_vars():
     assert any("making wrong use of unicode variable" in str(e) for e in mode.errors)
 
 
-def _make_fake_rule_with_src_combination(src_combination):
-    """Create a minimal fake rule object with the required shape."""
-    sub_rule = types.SimpleNamespace(src_combination=src_combination)
-    rule = types.SimpleNamespace(sub_rules=[sub_rule])
-    return rule
+def test_apply_vars_sees_redefined_pointer_targets():
+    mode = _FakeMode()
+    rg = RuleGroup(mode, name="test")
+
+    # Pointer vars are expanded lazily, at the time of use
+    rg.add_var("PTR", "{TARGET}", is_pointer=True)
+    rg.add_var("TARGET", "x")
+    assert rg.apply_vars(line=1, string="{PTR}") == "x"
 
+    rg.add_var("TARGET", "y")
+    assert rg.apply_vars(line=2, string="{PTR}") == "y"
 
-def test_build_input_charset_basic_and_ignores_special_chars():
+    rg.remove_var("TARGET")
+    assert rg.apply_vars(line=3, string="{PTR}") is None
+    assert any("failed to evaluate variable: {TARGET}" in str(e) for e in mode.errors)
+
+
+def test_apply_vars_resolves_references_formed_by_joined_values():
     mode = _FakeMode()
-    rg = RuleGroup(mode, name="default")
-    rg.in_charset = {}
-
-    # Rule with combination containing regular chars and special markers
-    src_combination = [
-        "AB",  # normal characters
-        TranscriptionProcessor.WORD_BREAKER,
-        "C",
-        TranscriptionProcessor.WORD_BOUNDARY_TREE,
-    ]
-    rg.rules = [_make_fake_rule_with_src_combination(src_combination)]
+    rg = RuleGroup(mode, name="test")
+    rg.add_var("OPEN", "{")
+    rg.add_var("TAIL", "X}")
+    rg.add_var("X", "done")
+    rg.add_var("HALF", "MISSING}")
+
+    # As in Ruby, substitution repeats until nothing changes
+    assert rg.apply_vars(line=1, string="{OPEN}{TAIL} {UNI_E000}", allow_unicode_vars=True) == "done {UNI_E000}"
+    assert mode.errors == []
 
-    rg._build_input_charset()
+    assert rg.apply_vars(line=2, string="{OPEN}{HALF}") is None
+    assert "failed to evaluate variable: {MISSING}" in str(mode.errors[0])
 
-    # Normal characters should be present
-    assert rg.in_charset["A"] is rg
-    assert rg.in_charset["B"] is rg
-    assert rg.in_charset["C"] is rg
 
-    # Special markers should not appear
-    assert TranscriptionProcessor.WORD_BREAKER not in rg.in_charset
-    assert TranscriptionProcessor.WORD_BOUNDARY_TREE not in rg.in_charset
+def test_apply_vars_circular_reference_overflows():
+    mode = _FakeMode()
+    rg = RuleGroup(mode, name="test")
+    rg.add_var("LOOP", "a{LOOP}", is_pointer=True)
+
+    assert rg.apply_vars(line=1, string="{LOOP}") is None
+    assert len(mode.errors) == 1
+    assert "evaluation stack overflow" in str(mode.errors[0])
+
+
+def test_apply_vars_chains_stop_at_sixteen_levels():
+    def chain(length):
+        mode = _FakeMode()
+        rg = RuleGroup(mode, name="test")
+        for i in range(length - 1):
+            rg.add_var(f"V{i}", f"{{V{i + 1}}}")
+        rg.add_var(f"V{length - 1}", "end")
+        return mode, rg.apply_vars(line=1, string="{V0}")
+
+    mode, result = chain(16)
+    assert result == "end"
+    assert mode.errors == []
+
+    mode, result = chain(17)
+    assert result is None
+    assert len(mode.errors) == 1
+    assert "evaluation stack overflow" in str(mode.errors[0])
+
+
+def test_apply_vars_reports_every_unknown_variable():
+    mode = _FakeMode()
+    rg = RuleGroup(mode, name="test")
+    rg.add_var("NESTED", "{MISSING}")
+
+    assert rg.apply_vars(line=1, string="{NESTED}{ALSO_MISSING}") is None
+    assert [str(e) for e in mode.errors] == [
+        "Line 1: In expression: {NESTED}{ALSO_MISSING}: failed to evaluate variable: {MISSING}.",
+        "Line 1: In expression: {NESTED}{ALSO_MISSING}: failed to evaluate variable: {ALSO_MISSING}.",
+    ]
 
 
-def test_build_input_charset_numbers_group_guard():
+def test_evaluate_condition_uses_parsed_conditions():
     mode = _FakeMode()
-    rg = RuleGroup(mode, name="numbers")
-    rg.in_charset = {}
+    mode.options = {}
+    rg = RuleGroup(mode, name="test")
+    options = {"implicit_a": "true", "style": "FULL"}
+
+    from glaemscribe.core.rule_group import Condition
+
+    assert rg._evaluate_condition(Condition.parse("implicit_a"), options)
+    assert not rg._evaluate_condition(Condition.parse("!implicit_a"), options)
+    assert rg._evaluate_condition(Condition.parse('style == "FULL"'), options)
+    assert rg._evaluate_condition(Condition.parse("! style == SHORT"), options)
+    assert rg._evaluate_condition(Condition.parse("true"), options)
+    assert not rg._evaluate_condition(Condition.parse("unknown_option"), options)
+
+
+def test_strip_inline_comments():
+    assert RuleGroup.strip_inline_comments("a \\** note **\\ --> b") == "a  --> b"
+    assert RuleGroup.strip_inline_comments("a --> b") == "a --> b"
+
+
+def test_traverse_if_tree_builds_branches_and_reports_dangling_keywords():
+    from glaemscribe.core.rule_group import IfTerm
+    from glaemscribe.parsers.glaeml import Node, NodeType
+
+    def element(name, *args):
+        return Node(1, NodeType.ELEMENT_INLINE, name, list(args))
+
+    root = Node(0, NodeType.ELEMENT_BLOCK, "rules", children=[
+        element("if", "implicit_a"),
+        element("deploy"),
+        element("elsif", "other"),
+        element("else"),
+        element("endif"),
+        element("deploy"),
+    ])
+    rg = RuleGroup(_FakeMode(), name="test")
+    seen = []
+    rg.traverse_if_tree(root, None, lambda block, child: seen.append(block))
+
+    if_term = rg.root_code_block.terms[0]
+    assert isinstance(if_term, IfTerm)
+    assert [cond.expression for cond in if_term.conds] == ["implicit_a", "other", "true"]
+    assert seen == [if_term.conds[0].child_code_block, rg.root_code_block]
+    assert rg.mode.errors == []
+
+    rg = RuleGroup(_FakeMode(), name="test")
+    rg.traverse_if_tree(Node(0, NodeType.ELEMENT_BLOCK, "rules", children=[element("endif")]), None, None)
+    assert [e.message for e in rg.mode.errors] == ["'endif' without a 'if'."]
+
 
-    src_combination = ["AB"]  # would normally add 'A' and 'B'
-    rg.rules = [_make_fake_rule_with_src_combination(src_combination)]
+def test_macro_backtrace_only_written_when_errors_occur():
+    from glaemscribe.core.macro import Macro, MacroDeployTerm
 
-    rg._build_input_charset()
+    rg = RuleGroup(_FakeMode(), name="test")
+    macro = Macro(rg, "VOWEL", ["V"])
+    deploy = MacroDeployTerm(macro, 7, rg.root_code_block, ["a"])
 
-    # Guard: numbers group should not capture A/B
-    assert "A" not in rg.in_charset
-    assert "B" not in rg.in_charset
+    retract = rg._deploy_macro(deploy)
+    assert rg.vars["V"].value == "a"
+    retract()
+    assert "V" not in rg.vars
+    assert rg.mode.errors == []
+
+    rg.add_var("V", "x")
+    rg._deploy_macro(deploy)()
+    messages = [e.message for e in rg.mode.errors]
+    assert messages[0] == ">> Macro backtrace : VOWEL"
+    assert messages[1].startswith("Local variable V hinders")
+    assert messages[-1] == "<< Macro backtrace : VOWEL"
+    assert len(messages) == 3
+
+
+def test_apply_vars_expression_cache_follows_variable_changes():
+    rg = RuleGroup(_FakeMode(), name="test")
+    rg.add_var("V", "a")
+
+    assert rg.apply_vars(1, "[{V}*e]") == "[a*e]"
+    assert rg._expanded_exprs["[{V}*e]"] == "[a*e]"
+
+    rg.add_var("V", "o")
+    assert rg.apply_vars(1, "[{V}*e]") == "[o*e]"
+
+    rg.remove_var("V")
+    assert rg.apply_vars(1, "[{V}*e]") is None
+    assert "[{V}*e]" not in rg._expanded_exprs
+
+
+def test_process_code_block_dispatches_on_term_kind():
+    from glaemscribe.core.rule_group import CodeLine, CodeLinesTerm, IfTerm
+
+    mode = _FakeMode()
+    mode.options = {}
+    rg = RuleGroup(mode, name="test")
+    block = rg.root_code_block
+    block.add_term(CodeLine("{A} === a", 1))
+    lines = CodeLinesTerm(block)
+    lines.code_lines = [CodeLine("{B} === b", 2)]
+    block.add_term(lines)
+    if_term = IfTerm(block)
+    block.add_term(if_term)
+    rg._create_if_cond_for_if_term(3, if_term, "implicit_a").child_code_block.add_term(CodeLine("{C} === c", 4))
+    rg._create_if_cond_for_if_term(5, if_term, "true").child_code_block.add_term(CodeLine("{D} === d", 6))
+
+    rg._process_code_block(block, {"implicit_a": "false"})
+
+    assert [name for name in rg.vars] == ["A", "B", "D"]
@@ -0,0 +1,84 @@
+"""Focused tests for glaemscribe.core.sheaf_chain_iterator."""
+
+import types
+
+from glaemscribe.core.sheaf_chain import SheafChain
+from glaemscribe.core.sheaf_chain_iterator import SheafChainIterator
+
+
+def _make_chain(expression, is_src=True):
+    """Build a SheafChain on top of a minimal fake rule."""
+    mode = types.SimpleNamespace(errors=[])
+    rule = types.SimpleNamespace(mode=mode)
+    return SheafChain(rule, expression, is_src)
+
+
+def test_iter_yields_every_state_once():
+    iterator = SheafChainIterator(_make_chain("[a*b][c*d*e]"))
+
+    states = [combos for combos in iterator]
+
+    assert len(states) == 6
+    assert states[0] == [["a", "c"]]
+    assert states[1] == [["b", "c"]]
+    assert states[-1] == [["b", "e"]]
+    # Counters are back at the start once iteration wraps
+    assert iterator.iterators == [0, 0]
+
+
+def test_iter_expands_equivalences_within_a_state():
+    iterator = SheafChainIterator(_make_chain("[(a,b)*c]x"))
+
+    states = list(iterator)
+
+    assert states == [[["a", "x"], ["b", "x"]], [["c", "x"]]]
+
+
+def test_cross_schema_changes_iteration_order():
+    iterator = SheafChainIterator(_make_chain("[a*b][c*d]", is_src=False), "2,1")
+
+    assert iterator.errors == []
+    assert [combos[0] for combos in iterator] == [
+        ["a", "c"], ["a", "d"], ["b", "c"], ["b", "d"],
+    ]
+
+
+def test_iter_combinations_matches_combinations_lazily():
+    iterator = SheafChainIterator(_make_chain("[(a,b)*c][(x,y)*z]"))
+
+    lazy = iterator.iter_combinations()
+    assert next(lazy) == ["a", "x"]
+    assert list(lazy) == [["a", "y"], ["b", "x"], ["b", "y"]]
+    assert list(iterator.iter_combinations()) == iterator.combinations()
+
+
+def test_sheaf_side_flags_are_plain_booleans():
+    src = _make_chain("[a*b]x")
+    dst = _make_chain("[a*b]x", is_src=False)
+
+    assert src.is_src is True and src.sheaves[0].is_src is True
+    assert dst.sheaves[1].is_src is False
+    assert src.sheaves[0].fragments[0].is_dst() is False
+    assert dst.sheaves[0].fragments[0].is_dst() is True
+    assert [sheaf.linkable for sheaf in src.sheaves] == [True, False]
+
+
+def test_cross_schema_must_be_a_permutation():
+    iterator = SheafChainIterator(_make_chain("[a*b][c*d]", is_src=False), "1,1")
+
+    assert len(iterator.errors) == 1
+    assert "permutation of the identity" in iterator.errors[0]
+    assert iterator.cross_array == [0, 1]
+
+
+def test_iterate_follows_the_cross_schema_order():
+    iterator = SheafChainIterator(_make_chain("[a*b][c*d*e]", is_src=False), "2,1")
+    expected = [combos[0] for combos in iterator]
+
+    states = [iterator.combinations()[0]]
+    while iterator.iterate():
+        states.append(iterator.combinations()[0])
+
+    assert states == expected
+    assert states[:2] == [["a", "c"], ["a", "d"]]
+    assert iterator.iterators == [0, 0]
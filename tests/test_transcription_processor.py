@@ -0,0 +1,85 @@
+"""Focused tests for glaemscribe.core.transcription_processor."""
+
+import types
+
+from glaemscribe.core.mode_debug_context import ModeDebugContext
+from glaemscribe.core.transcription_processor import TranscriptionProcessor
+
+
+def _make_processor(paths):
+    processor = TranscriptionProcessor(types.SimpleNamespace(errors=[]))
+    rule = types.SimpleNamespace(sub_rules=[
+        types.SimpleNamespace(src_combination=[src], src_path=src, dst_combination=dst)
+        for src, dst in paths.items()
+    ])
+    group = types.SimpleNamespace(rules=[rule], in_charset={},
+                                  finalize=lambda options: None)
+    processor.add_rule_group("main", group)
+    processor.finalize({})
+    return processor
+
+
+def test_repeated_words_reuse_cached_tokens():
+    processor = _make_processor({"a": ["A"], "ai": ["AI"]})
+
+    first = processor._transcribe_word("aia")
+    # Word boundaries transcribe to empty tokens
+    assert first == ["", "AI", "A", ""]
+    first.append("MUTATED")
+    assert processor._transcribe_word("aia") == ["", "AI", "A", ""]
+    assert processor.transcribe("aia aia") == [
+        "", "AI", "A", "", "*SPACE", "", "AI", "A", "",
+    ]
+
+
+def test_word_cache_evicts_least_recently_used_words():
+    processor = _make_processor({"a": ["A"], "b": ["B"], "c": ["C"]})
+    processor.WORD_CACHE_SIZE = 2
+
+    processor._transcribe_word("a")
+    processor._transcribe_word("b")
+    processor._transcribe_word("a")
+    processor._transcribe_word("c")
+
+    assert list(processor._word_cache) == ["a", "c"]
+
+
+def test_debug_context_records_each_match_even_for_cached_words():
+    processor = _make_processor({"a": ["A"], "ai": ["AI"]})
+    processor._transcribe_word("aia")
+
+    ctx = ModeDebugContext()
+    assert processor._transcribe_word("aia", ctx) == ["", "AI", "A", ""]
+    assert ctx.processor_pathes == [
+        ["\0", [""], [""]],
+        ["ai", ["AI"], ["AI"]],
+        ["a", ["A"], ["A"]],
+        ["\0", [""], [""]],
+    ]
+
+
+def test_finalize_drops_cached_words():
+    processor = _make_processor({"a": ["A"]})
+    assert processor._transcribe_word("a") == ["", "A", ""]
+
+    processor.rule_groups["main"].rules[0].sub_rules[0].dst_combination = ["B"]
+    processor.finalize({})
+
+    assert processor._transcribe_word("a") == ["", "B", ""]
+
+
+def test_break_characters_split_words_and_carriage_return_is_dropped():
+    processor = _make_processor({"a": ["A"], "aa": ["AA"]})
+
+    assert processor.transcribe("a\r\ta\na\ra") == [
+        "", "A", "", "*SPACE", "", "A", "", "*LF", "", "AA", "",
+    ]
+
+
+def test_break_characters_win_over_groups_that_list_them():
+    processor = _make_processor({"a": ["A"], "a a": ["A_A"]})
+    group = processor.rule_groups["main"]
+    group.in_charset = {"a": group, " ": group}
+    processor.finalize({})
+
+    assert processor.transcribe("a a") == ["", "A", "", "*SPACE", "", "A", ""]
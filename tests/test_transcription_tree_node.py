@@ -0,0 +1,47 @@
+"""Focused tests for glaemscribe.core.transcription_tree_node."""
+
+from glaemscribe.core.transcription_tree_node import TranscriptionTreeNode
+
+
+def _make_tree():
+    tree = TranscriptionTreeNode()
+    tree.add_subpath("a", ["A"])
+    tree.add_subpath("ai", ["AI"])
+    tree.add_subpath("aiw", ["AIW"])
+    tree.add_subpath("th", ["TH"])
+    return tree
+
+
+def test_add_subpath_shares_prefixes_and_marks_ends():
+    tree = _make_tree()
+
+    a = tree.siblings["a"]
+    assert a.character == "a" and a.replacement == ["A"]
+    assert a.siblings["i"].replacement == ["AI"]
+    assert a.siblings["i"].siblings["w"].replacement == ["AIW"]
+    # Intermediate nodes stay non effective
+    assert not tree.siblings["t"].is_effective()
+    assert tree.siblings["t"].siblings["h"].replacement == ["TH"]
+
+    tree.add_subpath("", ["NOTHING"])
+    assert not tree.is_effective()
+
+
+def test_transcribe_takes_longest_match_and_falls_back():
+    tree = _make_tree()
+
+    assert tree.transcribe("aiwa") == (["AIW"], 3)
+    assert tree.transcribe("aix") == (["AI"], 2)
+    # "aiw" needs the full path; a dead end falls back to the last effective node
+    assert tree.transcribe("a") == (["A"], 1)
+    assert tree.transcribe("tx") == (["*UNKNOWN"], 1)
+    assert tree.transcribe("x") == (["*UNKNOWN"], 1)
+    assert tree.transcribe("") == (["*UNKNOWN"], 1)
+
+
+def test_transcribe_from_offset_matches_sliced_input():
+    tree = _make_tree()
+
+    assert tree.transcribe("xaiw", 1) == tree.transcribe("aiw") == (["AIW"], 3)
+    assert tree.transcribe("thai", 2) == (["AI"], 2)
+    assert tree.transcribe("th", 2) == (["*UNKNOWN"], 1)